@@ -6,18 +6,20 @@ with both native APIs and OpenRouter.
 """
 
 import os
+import asyncio
+import inspect
 from openai_agent import OpenAIRecursiveThinkingAgent
 from claude_agent import ClaudeRecursiveThinkingAgent
 from deepseek_agent import DeepSeekRecursiveThinkingAgent
 from gemini_agent import GeminiRecursiveThinkingAgent
 from local_lm_agent import LocalLMStudioAgent
 
-def example_openai_native():
+def example_openai_native(api_key: str = None):
     """Example using OpenAI with native API."""
     print("\n=== OpenAI with Native API ===\n")
 
-    # Get API key from environment or user input
-    api_key = os.getenv("OPENAI_API_KEY")
+    # Use the given API key, falling back to the environment or user input
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
     if not api_key:
         api_key = input("Enter your OpenAI API key: ")
 
@@ -37,12 +39,12 @@ def example_openai_native():
     print("\n=== Final Response ===\n")
     print(result["response"])
 
-def example_claude_native():
+def example_claude_native(api_key: str = None):
     """Example using Claude with native API."""
     print("\n=== Claude with Native API ===\n")
 
-    # Get API key from environment or user input
-    api_key = os.getenv("ANTHROPIC_API_KEY")
+    # Use the given API key, falling back to the environment or user input
+    api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         api_key = input("Enter your Anthropic API key: ")
 
@@ -62,12 +64,12 @@ def example_claude_native():
     print("\n=== Final Response ===\n")
     print(result["response"])
 
-def example_deepseek_native():
+def example_deepseek_native(api_key: str = None):
     """Example using DeepSeek with native API."""
     print("\n=== DeepSeek with Native API ===\n")
 
-    # Get API key from environment or user input
-    api_key = os.getenv("DEEPSEEK_API_KEY")
+    # Use the given API key, falling back to the environment or user input
+    api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
     if not api_key:
         api_key = input("Enter your DeepSeek API key: ")
 
@@ -87,12 +89,12 @@ def example_deepseek_native():
     print("\n=== Final Response ===\n")
     print(result["response"])
 
-def example_gemini_native():
+def example_gemini_native(api_key: str = None):
     """Example using Gemini with native API."""
     print("\n=== Gemini with Native API ===\n")
 
-    # Get API key from environment or user input
-    api_key = os.getenv("GOOGLE_API_KEY")
+    # Use the given API key, falling back to the environment or user input
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
     if not api_key:
         api_key = input("Enter your Google API key: ")
 
@@ -132,12 +134,12 @@ def example_local_lm_studio():
     print("\n=== Final Response ===\n")
     print(result["response"])
 
-def example_openrouter():
+async def example_openrouter(api_key: str = None):
     """Example using OpenRouter with different models."""
     print("\n=== OpenRouter with Different Models ===\n")
 
-    # Get API key from environment or user input
-    api_key = os.getenv("OPENROUTER_API_KEY")
+    # Use the given API key, falling back to the environment or user input
+    api_key = api_key or os.getenv("OPENROUTER_API_KEY")
     if not api_key:
         api_key = input("Enter your OpenRouter API key: ")
 
@@ -172,19 +174,17 @@ def example_openrouter():
         openrouter_model="openai/gpt-3.5-turbo"
     )
 
-    # Get responses from each agent
+    # Get responses from each agent concurrently; each call is independent network I/O
     prompt = "What are the ethical implications of AI?"
 
-    print("\n--- OpenAI via OpenRouter ---\n")
-    openai_result = openai_agent.think_and_respond(prompt)
-    print("\n--- Claude via OpenRouter ---\n")
-    claude_result = claude_agent.think_and_respond(prompt)
-    print("\n--- DeepSeek via OpenRouter ---\n")
-    deepseek_result = deepseek_agent.think_and_respond(prompt)
-    print("\n--- Gemini via OpenRouter ---\n")
-    gemini_result = gemini_agent.think_and_respond(prompt)
-    print("\n--- Local LM via OpenRouter ---\n")
-    local_result = local_agent.think_and_respond(prompt)
+    print("\n--- Querying all models via OpenRouter ---\n")
+    openai_result, claude_result, deepseek_result, gemini_result, local_result = await asyncio.gather(
+        openai_agent.athink_and_respond(prompt),
+        claude_agent.athink_and_respond(prompt),
+        deepseek_agent.athink_and_respond(prompt),
+        gemini_agent.athink_and_respond(prompt),
+        local_agent.athink_and_respond(prompt),
+    )
 
     # Print final responses
     print("\n=== Final Responses ===\n")
@@ -194,6 +194,33 @@ def example_openrouter():
     print("\nGemini:", gemini_result["response"][:100] + "...")
     print("\nLocal LM:", local_result["response"][:100] + "...")
 
+# Example functions by menu choice, with the environment variable holding each one's API key
+EXAMPLES = {
+    "1": (example_openai_native, "OPENAI_API_KEY"),
+    "2": (example_claude_native, "ANTHROPIC_API_KEY"),
+    "3": (example_deepseek_native, "DEEPSEEK_API_KEY"),
+    "4": (example_gemini_native, "GOOGLE_API_KEY"),
+    "5": (example_local_lm_studio, None),
+    "6": (example_openrouter, "OPENROUTER_API_KEY"),
+}
+
+def _load_keys(key_names: list) -> dict:
+    """Collect API keys from the environment, prompting once for each missing key."""
+    labels = {
+        "OPENAI_API_KEY": "OpenAI",
+        "ANTHROPIC_API_KEY": "Anthropic",
+        "DEEPSEEK_API_KEY": "DeepSeek",
+        "GOOGLE_API_KEY": "Google",
+        "OPENROUTER_API_KEY": "OpenRouter",
+    }
+    keys = {}
+    for key_name in key_names:
+        api_key = os.getenv(key_name)
+        if not api_key:
+            api_key = input(f"Enter your {labels[key_name]} API key: ")
+        keys[key_name] = api_key
+    return keys
+
 def main():
     """Main function to run examples."""
     print("Recursive Thinking Agents - Examples")
@@ -211,27 +238,23 @@ def main():
 
     choice = input("\nEnter your choice (1-7): ")
 
-    if choice == "1":
-        example_openai_native()
-    elif choice == "2":
-        example_claude_native()
-    elif choice == "3":
-        example_deepseek_native()
-    elif choice == "4":
-        example_gemini_native()
-    elif choice == "5":
-        example_local_lm_studio()
-    elif choice == "6":
-        example_openrouter()
-    elif choice == "7":
-        example_openai_native()
-        example_claude_native()
-        example_deepseek_native()
-        example_gemini_native()
-        example_local_lm_studio()
-        example_openrouter()
+    if choice == "7":
+        selected = [EXAMPLES[key] for key in sorted(EXAMPLES)]
+    elif choice in EXAMPLES:
+        selected = [EXAMPLES[choice]]
     else:
         print("Invalid choice. Please run the script again.")
+        return
+
+    # Ask for every missing key up front so the examples can then run unattended
+    keys = _load_keys([key_name for _, key_name in selected if key_name])
+
+    for example, key_name in selected:
+        kwargs = {"api_key": keys[key_name]} if key_name else {}
+        if inspect.iscoroutinefunction(example):
+            asyncio.run(example(**kwargs))
+        else:
+            example(**kwargs)
 
 if __name__ == "__main__":
     main()
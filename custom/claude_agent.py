@@ -1,12 +1,14 @@
 import os
 from typing import List, Dict, Any, Optional
-import json
-import requests
 from datetime import datetime
 import time
 import anthropic
 
-from recursive_thinking_base import BaseRecursiveThinkingAgent
+from recursive_thinking_base import BaseRecursiveThinkingAgent, shared_http_client
+
+def _cacheable_text(text: str) -> List[Dict]:
+    """Wrap text in a content block marked as an Anthropic prompt-cache breakpoint."""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
 
 class ClaudeRecursiveThinkingAgent(BaseRecursiveThinkingAgent):
     """Claude implementation of the recursive thinking agent."""
@@ -36,38 +38,55 @@ class ClaudeRecursiveThinkingAgent(BaseRecursiveThinkingAgent):
             self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
             self.model = model
             # Configure Anthropic client
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            self.client = anthropic.Anthropic(api_key=self.api_key, http_client=shared_http_client())
+            self.max_output_tokens = 8192
 
-    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
+    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
         """Make an API call to Claude or OpenRouter."""
         if self.use_openrouter:
-            return self._call_openrouter_api(messages, temperature, stream)
+            return self._call_openrouter_api(messages, temperature, stream, **options)
         else:
-            return self._call_native_api(messages, temperature, stream)
+            return self._call_native_api(messages, temperature, stream, **options)
+
+    async def _acall_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = False, **options) -> str:
+        """Make a non-blocking API call, using the async Anthropic client for the native API."""
+        if self.use_openrouter or stream:
+            return await super()._acall_api(messages, temperature, stream, **options)
 
-    def _call_native_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
-        """Make a native API call to Anthropic's Claude."""
         try:
-            # Convert messages to Claude format
-            claude_messages = self._convert_to_claude_messages(messages)
+            client = self._get_async_client("anthropic", lambda: anthropic.AsyncAnthropic(api_key=self.api_key))
+            response = await client.messages.create(
+                model=self.model,
+                temperature=temperature,
+                **self._claude_request_options(options),
+                **self._claude_message_params(messages)
+            )
+            return response.content[0].text
+        except Exception as e:
+            print(f"Claude API Error: {e}")
+            return "Error: Could not get response from Claude API"
 
+    def _call_native_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
+        """Make a native API call to Anthropic's Claude."""
+        try:
             response = self.client.messages.create(
                 model=self.model,
-                messages=claude_messages,
                 temperature=temperature,
                 stream=stream,
-                max_tokens=8192  # Increased token limit for Claude
+                **self._claude_request_options(options),
+                **self._claude_message_params(messages)
             )
 
             if stream:
                 full_response = ""
+                printer = self._stream_printer()
                 for chunk in response:
                     if hasattr(chunk, 'delta') and hasattr(chunk.delta, 'text'):
                         content = chunk.delta.text
                         if content:
                             full_response += content
-                            print(content, end="", flush=True)
-                print()  # New line after streaming
+                            printer.write(content)
+                printer.close()
                 return full_response
             else:
                 return response.content[0].text
@@ -75,69 +94,105 @@ class ClaudeRecursiveThinkingAgent(BaseRecursiveThinkingAgent):
             print(f"Claude API Error: {e}")
             return "Error: Could not get response from Claude API"
 
-    def _convert_to_claude_messages(self, messages: List[Dict]) -> List[Dict]:
-        """Convert standard chat messages to Claude's format."""
-        claude_messages = []
-
-        for msg in messages:
-            role = msg["role"]
-            content = msg["content"]
-
-            if role == "system":
-                # System messages are handled differently in Claude
-                # We'll prepend them to the first user message
-                continue
-            elif role == "user":
-                claude_messages.append({"role": "user", "content": content})
-            elif role == "assistant":
-                claude_messages.append({"role": "assistant", "content": content})
-
-        return claude_messages
-
-    def _call_openrouter_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
-        """Make an API call to OpenRouter."""
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "stream": stream,
-            "reasoning": {
-                "max_tokens": 10386,
+    @staticmethod
+    def _claude_request_options(options: Dict) -> Dict:
+        """Translate request options into Claude message parameters."""
+        params = {"max_tokens": options.get("max_tokens", 8192)}  # Increased token limit for Claude
+        # Claude rejects stop sequences that are only whitespace
+        stop = [sequence for sequence in options.get("stop") or [] if sequence.strip()]
+        if stop:
+            params["stop_sequences"] = stop
+        return params
+
+    def _claude_message_params(self, messages: List[Dict]) -> Dict:
+        """Build the messages and system parameters for a Claude request.
+
+        The system prompt and the message preceding the new turn are marked as
+        prompt-cache breakpoints, so repeated calls over the same conversation
+        reuse the provider's cached prefix instead of reprocessing it.
+        """
+        claude_messages = self._convert_to_claude_messages(messages)
+        if len(claude_messages) > 1:
+            claude_messages = list(claude_messages)
+            prefix_end = claude_messages[-2]
+            claude_messages[-2] = {
+                "role": prefix_end["role"],
+                "content": _cacheable_text(prefix_end["content"])
             }
-        }
 
-        try:
-            response = requests.post(
-                self.openrouter_base_url,
-                headers=self.openrouter_headers,
-                json=payload,
-                stream=stream
-            )
-            response.raise_for_status()
+        params = {"messages": claude_messages}
+        system_prompt = "\n\n".join(msg["content"] for msg in messages if msg["role"] == "system")
+        if system_prompt:
+            params["system"] = _cacheable_text(system_prompt)
+        return params
 
-            if stream:
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith("data: "):
-                            line = line[6:]
-                            if line.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(line)
-                                if "choices" in chunk and len(chunk["choices"]) > 0:
-                                    delta = chunk["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content:
-                                        full_response += content
-                                        print(content, end="", flush=True)
-                            except json.JSONDecodeError:
-                                continue
-                print()  # New line after streaming
-                return full_response
+    def _openrouter_payload(self, messages: List[Dict], temperature: float, stream: bool, options: Dict) -> Dict:
+        """Build the OpenRouter request body with the same prompt-cache breakpoints as the native API.
+
+        OpenRouter passes cache_control markers on content parts through to Anthropic.
+        """
+        if len(messages) > 1:
+            messages = list(messages)
+            prefix_end = messages[-2]
+            messages[-2] = {"role": prefix_end["role"], "content": _cacheable_text(prefix_end["content"])}
+        return super()._openrouter_payload(messages, temperature, stream, options)
+
+    def _convert_to_claude_messages(self, messages: List[Dict]) -> List[Dict]:
+        """Convert standard chat messages to Claude's format.
+
+        Messages without a system role are already in Claude's format and are
+        passed through unchanged.
+        """
+        if not any(msg["role"] == "system" for msg in messages):
+            return messages
+        claude_messages = (self._convert_to_claude_message(msg) for msg in messages)
+        return [msg for msg in claude_messages if msg is not None]
+
+    @staticmethod
+    def _convert_to_claude_message(msg: Dict) -> Optional[Dict]:
+        """Convert a single chat message to Claude's format."""
+        role = msg["role"]
+        content = msg["content"]
+
+        if role == "system":
+            # Claude takes system prompts through the separate system parameter
+            return None
+        elif role == "user":
+            return {"role": "user", "content": content}
+        elif role == "assistant":
+            return {"role": "assistant", "content": content}
+        return None
+
+    def submit_batch(self, prompts: List[str]) -> str:
+        """Submit independent prompts to the Anthropic Message Batches API."""
+        if self.use_openrouter:
+            raise NotImplementedError("Batch requests require the native Anthropic API")
+
+        batch = self.client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": str(i),
+                    "params": {
+                        "model": self.model,
+                        "max_tokens": 8192,
+                        "messages": [{"role": "user", "content": prompt}]
+                    }
+                }
+                for i, prompt in enumerate(prompts)
+            ]
+        )
+        return batch.id
+
+    def fetch_batch(self, batch_id: str) -> Optional[List[str]]:
+        """Fetch the results of an Anthropic message batch."""
+        batch = self.client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != "ended":
+            return None
+
+        responses = {}
+        for item in self.client.messages.batches.results(batch_id):
+            if item.result.type == "succeeded":
+                responses[int(item.custom_id)] = item.result.message.content[0].text
             else:
-                return response.json()['choices'][0]['message']['content'].strip()
-        except Exception as e:
-            print(f"OpenRouter API Error: {e}")
-            return "Error: Could not get response from OpenRouter API"
+                responses[int(item.custom_id)] = f"Error: Claude batch request {item.result.type}"
+        return [responses[i] for i in sorted(responses)]
\ No newline at end of file
@@ -1,10 +1,9 @@
 import os
 from typing import List, Dict, Any, Optional
-import json
-import requests
 from datetime import datetime
 import time
 
+import jsonlib
 from recursive_thinking_base import BaseRecursiveThinkingAgent
 
 class DeepSeekRecursiveThinkingAgent(BaseRecursiveThinkingAgent):
@@ -40,104 +39,39 @@ class DeepSeekRecursiveThinkingAgent(BaseRecursiveThinkingAgent):
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json"
             }
+            self._native_payload_template = {
+                "model": self.model,
+                "max_tokens": 4096  # Increase token limit for DeepSeek
+            }
 
-    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
+    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
         """Make an API call to DeepSeek or OpenRouter."""
         if self.use_openrouter:
-            return self._call_openrouter_api(messages, temperature, stream)
+            return self._call_openrouter_api(messages, temperature, stream, **options)
         else:
-            return self._call_native_api(messages, temperature, stream)
+            return self._call_native_api(messages, temperature, stream, **options)
 
-    def _call_native_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
+    def _call_native_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
         """Make a native API call to DeepSeek."""
-        payload = {
-            "model": self.model,
+        payload = self._native_payload_template | {
             "messages": messages,
             "temperature": temperature,
-            "stream": stream,
-            "max_tokens": 4096  # Increase token limit for DeepSeek
+            "stream": stream
         }
+        payload.update(self._chat_completion_options(options))
 
         try:
-            response = requests.post(
-                self.deepseek_base_url,
-                headers=self.deepseek_headers,
-                json=payload,
-                stream=stream
-            )
-            response.raise_for_status()
+            with self._post_with_retries(
+                    self.deepseek_base_url,
+                    headers=self.deepseek_headers,
+                    content=jsonlib.dumps(payload)
+            ) as response:
+                response.raise_for_status()
 
-            if stream:
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith("data: "):
-                            line = line[6:]
-                            if line.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(line)
-                                if "choices" in chunk and len(chunk["choices"]) > 0:
-                                    delta = chunk["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content:
-                                        full_response += content
-                                        print(content, end="", flush=True)
-                            except json.JSONDecodeError:
-                                continue
-                print()  # New line after streaming
-                return full_response
-            else:
-                return response.json()['choices'][0]['message']['content'].strip()
+                if stream:
+                    return self._stream_chat_completion(response)
+                else:
+                    return self._completion_content(response.read())
         except Exception as e:
             print(f"DeepSeek API Error: {e}")
             return "Error: Could not get response from DeepSeek API"
-
-    def _call_openrouter_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
-        """Make an API call to OpenRouter."""
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "stream": stream,
-            "reasoning": {
-                "max_tokens": 10386,
-            }
-        }
-
-        try:
-            response = requests.post(
-                self.openrouter_base_url,
-                headers=self.openrouter_headers,
-                json=payload,
-                stream=stream
-            )
-            response.raise_for_status()
-
-            if stream:
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith("data: "):
-                            line = line[6:]
-                            if line.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(line)
-                                if "choices" in chunk and len(chunk["choices"]) > 0:
-                                    delta = chunk["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content:
-                                        full_response += content
-                                        print(content, end="", flush=True)
-                            except json.JSONDecodeError:
-                                continue
-                print()  # New line after streaming
-                return full_response
-            else:
-                return response.json()['choices'][0]['message']['content'].strip()
-        except Exception as e:
-            print(f"OpenRouter API Error: {e}")
-            return "Error: Could not get response from OpenRouter API"
@@ -1,7 +1,5 @@
 import os
 from typing import List, Dict, Any, Optional
-import json
-import requests
 from datetime import datetime
 import time
 import google.genai as genai
@@ -37,15 +35,33 @@ class GeminiRecursiveThinkingAgent(BaseRecursiveThinkingAgent):
             self.model = model
             # Create Gemini client
             self.client = genai.Client(api_key=self.api_key)
+            self.max_output_tokens = 8192
 
-    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
+    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
         """Make an API call to Gemini or OpenRouter."""
         if self.use_openrouter:
-            return self._call_openrouter_api(messages, temperature, stream)
+            return self._call_openrouter_api(messages, temperature, stream, **options)
         else:
-            return self._call_native_api(messages, temperature, stream)
+            return self._call_native_api(messages, temperature, stream, **options)
 
-    def _call_native_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
+    async def _acall_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = False, **options) -> str:
+        """Make a non-blocking API call, using the async Gemini client for the native API."""
+        if self.use_openrouter or stream:
+            return await super()._acall_api(messages, temperature, stream, **options)
+
+        try:
+            client = self._get_async_client("gemini", lambda: genai.Client(api_key=self.api_key).aio)
+            response = await client.models.generate_content(
+                model=self.model,
+                contents=self._convert_to_gemini_messages(messages),
+                config=self._generation_config(temperature, options)
+            )
+            return self._message_text(response.text)
+        except Exception as e:
+            print(f"Gemini API Error: {e}")
+            return "Error: Could not get response from Gemini API"
+
+    def _call_native_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
         """Make a native API call to Google's Gemini."""
         try:
             # Convert messages to Gemini format
@@ -56,106 +72,65 @@ class GeminiRecursiveThinkingAgent(BaseRecursiveThinkingAgent):
                 response = self.client.models.generate_content_stream(
                     model=self.model,
                     contents=gemini_messages,
-                    config=genai.types.GenerateContentConfig(
-                        temperature=temperature,
-                        max_output_tokens=8192,
-                    )
+                    config=self._generation_config(temperature, options)
                 )
 
                 full_response = ""
+                printer = self._stream_printer()
                 for chunk in response:
                     if hasattr(chunk, 'text'):
                         content = chunk.text
                         if content:
                             full_response += content
-                            print(content, end="", flush=True)
-                print()  # New line after streaming
+                            printer.write(content)
+                printer.close()
                 return full_response
             else:
                 response = self.client.models.generate_content(
                     model=self.model,
                     contents=gemini_messages,
-                    config=genai.types.GenerateContentConfig(
-                        temperature=temperature,
-                        max_output_tokens=8192,
-                    )
+                    config=self._generation_config(temperature, options)
                 )
-                return response.text
+                return self._message_text(response.text)
         except Exception as e:
             print(f"Gemini API Error: {e}")
             return "Error: Could not get response from Gemini API"
 
+    @staticmethod
+    def _generation_config(temperature: float, options: Dict) -> genai.types.GenerateContentConfig:
+        """Build the Gemini generation config for a request."""
+        return genai.types.GenerateContentConfig(
+            temperature=temperature,
+            max_output_tokens=options.get("max_tokens", 8192),
+            stop_sequences=options.get("stop"),
+            response_mime_type="application/json" if options.get("json_mode") else None,
+        )
+
     def _convert_to_gemini_messages(self, messages: List[Dict]) -> List[Dict]:
         """Convert standard chat messages to Gemini's format."""
-        gemini_messages = []
-
-        for msg in messages:
-            role = msg["role"]
-            content = msg["content"]
-
-            if role == "system":
-                # Add system message as user message with special prefix
-                gemini_messages.append(genai.types.Content(
-                    role="user",
-                    parts=[genai.types.Part.from_text(f"System: {content}")]
-                ))
-            elif role == "user":
-                gemini_messages.append(genai.types.Content(
-                    role="user",
-                    parts=[genai.types.Part.from_text(content)]
-                ))
-            elif role == "assistant":
-                gemini_messages.append(genai.types.Content(
-                    role="model",
-                    parts=[genai.types.Part.from_text(content)]
-                ))
-
-        return gemini_messages
-
-    def _call_openrouter_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
-        """Make an API call to OpenRouter."""
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "stream": stream,
-            "reasoning": {
-                "max_tokens": 10386,
-            }
-        }
-
-        try:
-            response = requests.post(
-                self.openrouter_base_url,
-                headers=self.openrouter_headers,
-                json=payload,
-                stream=stream
+        gemini_messages = (self._convert_to_gemini_message(msg) for msg in messages)
+        return [msg for msg in gemini_messages if msg is not None]
+
+    @staticmethod
+    def _convert_to_gemini_message(msg: Dict) -> Optional[genai.types.Content]:
+        """Convert a single chat message to Gemini's format."""
+        role = msg["role"]
+        content = msg["content"]
+
+        if role == "system":
+            # Add system message as user message with special prefix
+            return genai.types.Content(
+                role="user",
+                parts=[genai.types.Part.from_text(f"System: {content}")]
             )
-            response.raise_for_status()
-
-            if stream:
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith("data: "):
-                            line = line[6:]
-                            if line.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(line)
-                                if "choices" in chunk and len(chunk["choices"]) > 0:
-                                    delta = chunk["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content:
-                                        full_response += content
-                                        print(content, end="", flush=True)
-                            except json.JSONDecodeError:
-                                continue
-                print()  # New line after streaming
-                return full_response
-            else:
-                return response.json()['choices'][0]['message']['content'].strip()
-        except Exception as e:
-            print(f"OpenRouter API Error: {e}")
-            return "Error: Could not get response from OpenRouter API"
+        elif role == "user":
+            return genai.types.Content(
+                role="user",
+                parts=[genai.types.Part.from_text(content)]
+            )
+        elif role == "assistant":
+            return genai.types.Content(
+                role="model",
+                parts=[genai.types.Part.from_text(content)]
+            )
+        return None
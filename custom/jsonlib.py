@@ -0,0 +1,27 @@
+"""JSON helpers that use orjson when it is installed and fall back to the standard library."""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+    dumps = orjson.dumps
+    JSONDecodeError = orjson.JSONDecodeError
+
+    def dumps_indented(obj) -> bytes:
+        """Serialize an object to UTF-8 JSON indented by two spaces, for files meant to be read."""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+else:
+    loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+    def dumps(obj) -> bytes:
+        """Serialize an object to compact UTF-8 JSON, matching orjson.dumps."""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def dumps_indented(obj) -> bytes:
+        """Serialize an object to UTF-8 JSON indented by two spaces, matching dumps_indented with orjson."""
+        return (json.dumps(obj, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
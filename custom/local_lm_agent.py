@@ -1,10 +1,9 @@
 import os
 from typing import List, Dict, Any, Optional
-import json
-import requests
 from datetime import datetime
 import time
 
+import jsonlib
 from recursive_thinking_base import BaseRecursiveThinkingAgent
 
 class LocalLMStudioAgent(BaseRecursiveThinkingAgent):
@@ -46,109 +45,45 @@ class LocalLMStudioAgent(BaseRecursiveThinkingAgent):
             self.headers = {
                 "Content-Type": "application/json"
             }
+            self._local_payload_template = {
+                "max_tokens": 4096  # Increase token limit for local models
+            }
+            # Add model if specified (optional for LM Studio)
+            if self.model:
+                self._local_payload_template["model"] = self.model
 
-    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
+    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
         """Make an API call to LM Studio or OpenRouter."""
         if self.use_openrouter:
-            return self._call_openrouter_api(messages, temperature, stream)
+            return self._call_openrouter_api(messages, temperature, stream, **options)
         else:
-            return self._call_local_api(messages, temperature, stream)
+            return self._call_local_api(messages, temperature, stream, **options)
 
-    def _call_local_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
+    def _call_local_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
         """Make a local API call to LM Studio."""
         endpoint = f"{self.api_url}/chat/completions"
 
-        payload = {
+        payload = self._local_payload_template | {
             "messages": messages,
             "temperature": temperature,
-            "stream": stream,
-            "max_tokens": 4096  # Increase token limit for local models
+            "stream": stream
         }
-
-        # Add model if specified (optional for LM Studio)
-        if self.model:
-            payload["model"] = self.model
+        # LM Studio has no json_object response format, so only the other options are passed on
+        options = {key: value for key, value in options.items() if key != "json_mode"}
+        payload.update(self._chat_completion_options(options))
 
         try:
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                json=payload,
-                stream=stream
-            )
-            response.raise_for_status()
+            with self._post_with_retries(
+                    endpoint,
+                    headers=self.headers,
+                    content=jsonlib.dumps(payload)
+            ) as response:
+                response.raise_for_status()
 
-            if stream:
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith("data: "):
-                            line = line[6:]
-                            if line.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(line)
-                                if "choices" in chunk and len(chunk["choices"]) > 0:
-                                    delta = chunk["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content:
-                                        full_response += content
-                                        print(content, end="", flush=True)
-                            except json.JSONDecodeError:
-                                continue
-                print()  # New line after streaming
-                return full_response
-            else:
-                return response.json()['choices'][0]['message']['content'].strip()
+                if stream:
+                    return self._stream_chat_completion(response)
+                else:
+                    return self._completion_content(response.read())
         except Exception as e:
             print(f"LM Studio API Error: {e}")
             return "Error: Could not get response from LM Studio API"
-
-    def _call_openrouter_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
-        """Make an API call to OpenRouter."""
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "stream": stream,
-            "reasoning": {
-                "max_tokens": 10386,
-            }
-        }
-
-        try:
-            response = requests.post(
-                self.openrouter_base_url,
-                headers=self.openrouter_headers,
-                json=payload,
-                stream=stream
-            )
-            response.raise_for_status()
-
-            if stream:
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith("data: "):
-                            line = line[6:]
-                            if line.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(line)
-                                if "choices" in chunk and len(chunk["choices"]) > 0:
-                                    delta = chunk["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content:
-                                        full_response += content
-                                        print(content, end="", flush=True)
-                            except json.JSONDecodeError:
-                                continue
-                print()  # New line after streaming
-                return full_response
-            else:
-                return response.json()['choices'][0]['message']['content'].strip()
-        except Exception as e:
-            print(f"OpenRouter API Error: {e}")
-            return "Error: Could not get response from OpenRouter API"
@@ -1,12 +1,8 @@
 import os
-from typing import List, Dict, Any, Optional
-import json
-import requests
-from datetime import datetime
-import time
-import openai
+from typing import List, Dict, Optional
 
-from recursive_thinking_base import BaseRecursiveThinkingAgent
+import jsonlib
+from recursive_thinking_base import BaseRecursiveThinkingAgent, shared_http_client, new_async_http_client
 
 class OpenAIRecursiveThinkingAgent(BaseRecursiveThinkingAgent):
     """OpenAI implementation of the recursive thinking agent."""
@@ -35,88 +31,140 @@ class OpenAIRecursiveThinkingAgent(BaseRecursiveThinkingAgent):
         else:
             self.api_key = api_key or os.getenv("OPENAI_API_KEY")
             self.model = model
-            # Configure OpenAI client
-            openai.api_key = self.api_key
+            # Configure OpenAI client; the SDK is only imported when the native API is used
+            try:
+                import openai
+            except ImportError:
+                raise ImportError("OpenAI agent requires the 'openai' package. Install it with 'pip install openai'.")
 
-    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
+            self._openai = openai
+            self.client = openai.OpenAI(api_key=self.api_key, http_client=shared_http_client())
+
+    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
         """Make an API call to OpenAI or OpenRouter."""
         if self.use_openrouter:
-            return self._call_openrouter_api(messages, temperature, stream)
+            return self._call_openrouter_api(messages, temperature, stream, **options)
         else:
-            return self._call_native_api(messages, temperature, stream)
+            return self._call_native_api(messages, temperature, stream, **options)
+
+    async def _acall_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = False, **options) -> str:
+        """Make a non-blocking API call, using the async OpenAI client for the native API."""
+        if self.use_openrouter or stream:
+            return await super()._acall_api(messages, temperature, stream, **options)
+
+        try:
+            client = self._async_openai_client()
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                **({"max_tokens": 4096} | self._chat_completion_options(options))
+            )
+            return self._message_text(response.choices[0].message.content)
+        except Exception as e:
+            print(f"OpenAI API Error: {e}")
+            return "Error: Could not get response from OpenAI API"
+
+    def _async_openai_client(self):
+        """Return the async OpenAI client for the running event loop."""
+        return self._get_async_client(
+            "openai", lambda: self._openai.AsyncOpenAI(api_key=self.api_key, http_client=new_async_http_client())
+        )
+
+    async def _asample_api(self, messages: List[Dict], temperature: float, count: int,
+                           **options) -> Optional[List[str]]:
+        """Sample several completions with the native API's n parameter."""
+        if self.use_openrouter:
+            return await super()._asample_api(messages, temperature, count, **options)
+
+        try:
+            client = self._async_openai_client()
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                n=count,
+                **({"max_tokens": 4096} | self._chat_completion_options(options))
+            )
+            return [self._message_text(choice.message.content) for choice in response.choices]
+        except Exception as e:
+            print(f"OpenAI API Error: {e}")
+            return None
 
-    def _call_native_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
+    def _call_native_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
         """Make a native API call to OpenAI."""
         try:
-            client = openai.OpenAI(api_key=self.api_key)
-            response = client.chat.completions.create(
+            response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=temperature,
                 stream=stream,
-                max_tokens=4096  # Increase token limit for OpenAI
+                # Increase token limit for OpenAI
+                **({"max_tokens": 4096} | self._chat_completion_options(options))
             )
 
             if stream:
                 full_response = ""
+                printer = self._stream_printer()
                 for chunk in response:
                     if chunk.choices and len(chunk.choices) > 0:
                         content = chunk.choices[0].delta.content
                         if content:
                             full_response += content
-                            print(content, end="", flush=True)
-                print()  # New line after streaming
+                            printer.write(content)
+                printer.close()
                 return full_response
             else:
-                return response.choices[0].message.content.strip()
+                return self._message_text(response.choices[0].message.content)
         except Exception as e:
             print(f"OpenAI API Error: {e}")
             return "Error: Could not get response from OpenAI API"
 
-    def _call_openrouter_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
-        """Make an API call to OpenRouter."""
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "stream": stream,
-            "reasoning": {
-                "max_tokens": 10386,
-            }
-        }
+    def submit_batch(self, prompts: List[str]) -> str:
+        """Submit independent prompts to the OpenAI Batch API."""
+        if self.use_openrouter:
+            raise NotImplementedError("Batch requests require the native OpenAI API")
 
-        try:
-            response = requests.post(
-                self.openrouter_base_url,
-                headers=self.openrouter_headers,
-                json=payload,
-                stream=stream
-            )
-            response.raise_for_status()
+        lines = [
+            jsonlib.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "max_tokens": 4096
+                }
+            })
+            for i, prompt in enumerate(prompts)
+        ]
 
-            if stream:
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith("data: "):
-                            line = line[6:]
-                            if line.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(line)
-                                if "choices" in chunk and len(chunk["choices"]) > 0:
-                                    delta = chunk["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content:
-                                        full_response += content
-                                        print(content, end="", flush=True)
-                            except json.JSONDecodeError:
-                                continue
-                print()  # New line after streaming
-                return full_response
-            else:
-                return response.json()['choices'][0]['message']['content'].strip()
-        except Exception as e:
-            print(f"OpenRouter API Error: {e}")
-            return "Error: Could not get response from OpenRouter API"
+        batch_file = self.client.files.create(
+            file=("batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    def fetch_batch(self, batch_id: str) -> Optional[List[str]]:
+        """Fetch the results of an OpenAI batch."""
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"OpenAI batch {batch_id} {batch.status}")
+        if batch.status != "completed":
+            return None
+
+        responses = ["Error: No response in OpenAI batch output"] * batch.request_counts.total
+        if batch.output_file_id:
+            for line in self.client.files.content(batch.output_file_id).content.splitlines():
+                if not line.strip():
+                    continue
+                item = jsonlib.loads(line)
+                body = (item.get("response") or {}).get("body") or {}
+                if body.get("choices"):
+                    responses[int(item["custom_id"])] = self._message_text(body["choices"][0]["message"]["content"])
+        return responses
\ No newline at end of file
@@ -1,130 +1,130 @@
 import os
 import sys
 import importlib
-from typing import Dict, Any, Optional
+from typing import Dict, Any, NamedTuple, Optional
 import argparse
+import textwrap
+import tomllib
 from datetime import datetime
 
 # Import the base agent implementation
 from recursive_thinking_base import BaseRecursiveThinkingAgent
-
-# We'll use lazy imports for the specific agent implementations
-
-def get_api_key(provider: str, use_openrouter: bool) -> str:
-    """Get the API key for the specified provider."""
-    # Local LM Studio doesn't need an API key unless using OpenRouter
-    if provider == "local" and not use_openrouter:
-        return None
+from response_cache import ResponseCache
+from semantic_cache import SemanticCache
+
+class ProviderSpec(NamedTuple):
+    """How to load and configure the agent for one provider."""
+    module: str
+    class_name: str
+    agent_name: str
+    package: str
+    key_name: Optional[str]
+    key_label: Optional[str]
+    default_model: Optional[str]
+    openrouter_model: str
+
+# Agent implementations are imported lazily, only for the provider in use
+PROVIDERS: Dict[str, ProviderSpec] = {
+    "openai": ProviderSpec("openai_agent", "OpenAIRecursiveThinkingAgent", "OpenAI", "openai",
+                           "OPENAI_API_KEY", "OpenAI", "gpt-4o", "openai/gpt-4o"),
+    "claude": ProviderSpec("claude_agent", "ClaudeRecursiveThinkingAgent", "Claude", "anthropic",
+                           "ANTHROPIC_API_KEY", "Anthropic (Claude)",
+                           "claude-3-opus-20240229", "anthropic/claude-3-opus-20240229"),
+    "deepseek": ProviderSpec("deepseek_agent", "DeepSeekRecursiveThinkingAgent", "DeepSeek", "httpx",
+                             "DEEPSEEK_API_KEY", "DeepSeek", "deepseek-chat", "deepseek/deepseek-chat"),
+    "gemini": ProviderSpec("gemini_agent", "GeminiRecursiveThinkingAgent", "Gemini", "google-genai",
+                           "GOOGLE_API_KEY", "Google (Gemini)", "gemini-1.5-pro", "google/gemini-1.5-pro"),
+    # Local LM Studio needs no API key, and its model is configured in the LM Studio UI
+    "local": ProviderSpec("local_lm_agent", "LocalLMStudioAgent", "Local LM Studio", "httpx",
+                          None, None, None, "openai/gpt-3.5-turbo"),
+}
+
+DEFAULT_LOCAL_API_URL = "http://localhost:1234/v1"
+
+# Optional TOML file of API keys, with entries named like the environment variables
+KEYS_FILE = os.path.join(os.path.expanduser("~"), ".config", "recursive_thinking", "keys.toml")
+
+def load_keys_file(path: str = KEYS_FILE) -> Dict[str, Any]:
+    """Read API keys from a TOML file, returning an empty dict if it doesn't exist or can't be parsed."""
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+    except tomllib.TOMLDecodeError as e:
+        print(f"Warning: Ignoring malformed keys file {path}: {e}")
+        return {}
+
+def get_api_key(provider: str, use_openrouter: bool, api_key: str = None) -> str:
+    """Get the API key for the specified provider.
+
+    The key is taken from the api_key argument, the environment, or the keys
+    file, in that order. The user is only prompted when stdin is a terminal.
+    """
+    spec = PROVIDERS.get(provider)
+    if spec is None:
+        raise ValueError(f"Unknown provider: {provider}")
 
     if use_openrouter:
         key_name = "OPENROUTER_API_KEY"
         provider_name = "OpenRouter"
+    elif spec.key_name is None:
+        # Local LM Studio doesn't need an API key unless using OpenRouter
+        return None
     else:
-        if provider == "openai":
-            key_name = "OPENAI_API_KEY"
-            provider_name = "OpenAI"
-        elif provider == "claude":
-            key_name = "ANTHROPIC_API_KEY"
-            provider_name = "Anthropic (Claude)"
-        elif provider == "deepseek":
-            key_name = "DEEPSEEK_API_KEY"
-            provider_name = "DeepSeek"
-        elif provider == "gemini":
-            key_name = "GOOGLE_API_KEY"
-            provider_name = "Google (Gemini)"
-        else:
-            raise ValueError(f"Unknown provider: {provider}")
-
-    # Try to get from environment
-    api_key = os.getenv(key_name)
+        key_name = spec.key_name
+        provider_name = spec.key_label
+
+    # Try to get from the command line, environment, or keys file
+    api_key = api_key or os.getenv(key_name) or load_keys_file().get(key_name)
 
     # If not found, prompt user
-    if not api_key:
+    if not api_key and sys.stdin.isatty():
         api_key = input(f"Enter your {provider_name} API key: ").strip()
-        if not api_key and provider != "local":  # Allow empty for local
-            print(f"Error: No API key provided for {provider_name}")
-            sys.exit(1)
+    if not api_key:
+        print(f"Error: No API key provided for {provider_name}")
+        sys.exit(1)
 
     return api_key
 
-def create_agent(provider: str, use_openrouter: bool, model: str = None, api_url: str = None) -> BaseRecursiveThinkingAgent:
+def create_agent(provider: str, use_openrouter: bool, model: str = None, api_url: str = None,
+                 api_key: str = None) -> BaseRecursiveThinkingAgent:
     """Create an agent for the specified provider."""
-    api_key = get_api_key(provider, use_openrouter)
-
-    if provider == "openai":
-        try:
-            from openai_agent import OpenAIRecursiveThinkingAgent
-        except ImportError:
-            raise ImportError("OpenAI agent requires the 'openai' package. Install it with 'pip install openai'.")
-
-        default_model = "gpt-4o" if not use_openrouter else "openai/gpt-4o"
-        model = model or default_model
-        return OpenAIRecursiveThinkingAgent(
-            api_key=api_key,
-            model=model if not use_openrouter else None,
-            use_openrouter=use_openrouter,
-            openrouter_model=model if use_openrouter else None
-        )
-    elif provider == "claude":
-        try:
-            from claude_agent import ClaudeRecursiveThinkingAgent
-        except ImportError:
-            raise ImportError("Claude agent requires the 'anthropic' package. Install it with 'pip install anthropic'.")
-
-        default_model = "claude-3-opus-20240229" if not use_openrouter else "anthropic/claude-3-opus-20240229"
-        model = model or default_model
-        return ClaudeRecursiveThinkingAgent(
-            api_key=api_key,
-            model=model if not use_openrouter else None,
-            use_openrouter=use_openrouter,
-            openrouter_model=model if use_openrouter else None
-        )
-    elif provider == "deepseek":
-        try:
-            from deepseek_agent import DeepSeekRecursiveThinkingAgent
-        except ImportError:
-            raise ImportError("DeepSeek agent requires the 'requests' package. Install it with 'pip install requests'.")
-
-        default_model = "deepseek-chat" if not use_openrouter else "deepseek/deepseek-chat"
-        model = model or default_model
-        return DeepSeekRecursiveThinkingAgent(
-            api_key=api_key,
-            model=model if not use_openrouter else None,
-            use_openrouter=use_openrouter,
-            openrouter_model=model if use_openrouter else None
-        )
-    elif provider == "gemini":
-        try:
-            from gemini_agent import GeminiRecursiveThinkingAgent
-        except ImportError:
-            raise ImportError("Gemini agent requires the 'google-genai' package. Install it with 'pip install google-genai'.")
-
-        default_model = "gemini-1.5-pro" if not use_openrouter else "google/gemini-1.5-pro"
-        model = model or default_model
-        return GeminiRecursiveThinkingAgent(
-            api_key=api_key,
+    api_key = get_api_key(provider, use_openrouter, api_key)
+    spec = PROVIDERS[provider]
+
+    try:
+        agent_class = getattr(importlib.import_module(spec.module), spec.class_name)
+    except ImportError:
+        raise ImportError(f"{spec.agent_name} agent requires the '{spec.package}' package. "
+                          f"Install it with 'pip install {spec.package}'.")
+
+    model = model or (spec.openrouter_model if use_openrouter else spec.default_model)
+
+    if provider == "local":
+        return agent_class(
+            api_url=api_url or DEFAULT_LOCAL_API_URL,
             model=model if not use_openrouter else None,
             use_openrouter=use_openrouter,
-            openrouter_model=model if use_openrouter else None
-        )
-    elif provider == "local":
-        try:
-            from local_lm_agent import LocalLMStudioAgent
-        except ImportError:
-            raise ImportError("Local LM Studio agent requires the 'requests' package. Install it with 'pip install requests'.")
-
-        default_api_url = "http://localhost:1234/v1"
-        api_url = api_url or default_api_url
-        default_openrouter_model = "openai/gpt-3.5-turbo" if use_openrouter else None
-        return LocalLMStudioAgent(
-            api_url=api_url,
-            model=model,
-            use_openrouter=use_openrouter,
             openrouter_api_key=api_key,
-            openrouter_model=model or default_openrouter_model
+            openrouter_model=model if use_openrouter else None
         )
-    else:
-        raise ValueError(f"Unknown provider: {provider}")
+    return agent_class(
+        api_key=api_key,
+        model=model if not use_openrouter else None,
+        use_openrouter=use_openrouter,
+        openrouter_model=model if use_openrouter else None
+    )
+
+def print_thinking_item(label: str, response: str, verbose: bool = False, explanation: str = None):
+    """Print one response produced while thinking, shortened unless verbose."""
+    if not verbose:
+        response = textwrap.shorten(response, width=400, placeholder=" [...]")
+    print(f"\n{label}:")
+    print(f"  Response: {response}")
+    if explanation:
+        print(f"  Reason for selection: {explanation}")
+    print("-" * 50)
 
 def main():
     """Main function to run the recursive thinking agents."""
@@ -132,7 +132,7 @@ def main():
     parser.add_argument(
         "--provider",
         type=str,
-        choices=["openai", "claude", "deepseek", "gemini", "local"],
+        choices=list(PROVIDERS),
         default="openai",
         help="The LLM provider to use"
     )
@@ -146,6 +146,11 @@ def main():
         type=str,
         help="Model to use (provider-specific if not using OpenRouter)"
     )
+    parser.add_argument(
+        "--api-key",
+        type=str,
+        help=f"API key for the provider or OpenRouter (default: environment variable, then {KEYS_FILE})"
+    )
     parser.add_argument(
         "--api-url",
         type=str,
@@ -157,6 +162,33 @@ def main():
         default=3,
         help="Number of alternative responses to generate in each round (default: 3)"
     )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print every response considered while thinking in full (default: shortened)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Directory for a persistent cache of deterministic responses (requires 'diskcache')"
+    )
+    parser.add_argument(
+        "--cache-temperature",
+        type=float,
+        default=0.3,
+        help="Cache responses sampled at or below this temperature (default: 0.3, the round-count "
+             "and evaluation calls); -1 disables caching"
+    )
+    parser.add_argument(
+        "--semantic-cache",
+        action="store_true",
+        help="Reuse round counts for prompts similar in meaning to earlier ones (requires 'sentence-transformers')"
+    )
+    parser.add_argument(
+        "--thinking-log",
+        type=str,
+        help="JSONL file each turn's full thinking process is appended to as it completes"
+    )
     # Removed explicit markdown saving parameters - now happens automatically
 
     args = parser.parse_args()
@@ -171,10 +203,21 @@ def main():
         print(f"Model: {args.model}")
     if args.api_url:
         print(f"API URL: {args.api_url}")
+    if args.cache_dir:
+        print(f"Response cache: {args.cache_dir}")
+    if args.thinking_log:
+        print(f"Thinking log: {args.thinking_log}")
     print("=" * 50)
 
     # Create the agent
-    agent = create_agent(args.provider, args.openrouter, args.model, args.api_url)
+    agent = create_agent(args.provider, args.openrouter, args.model, args.api_url, args.api_key)
+    agent.cache_max_temperature = args.cache_temperature
+    if args.cache_dir:
+        agent.response_cache.close()
+        agent.response_cache = ResponseCache(directory=args.cache_dir)
+    if args.semantic_cache:
+        agent.semantic_cache = SemanticCache()
+    agent.thinking_log_path = args.thinking_log
 
     print("\nAgent initialized! Type 'exit' to quit, 'save' to save conversation.")
     print("Type 'save md' to save the last response as markdown.")
@@ -209,8 +252,22 @@ def main():
         elif not user_input:
             continue
 
-        # Get response with thinking process
-        result = agent.think_and_respond(user_input, num_alternatives=args.alternatives)
+        # Print the thinking process as it happens; each round's alternatives are requested concurrently.
+        # The initial draft is not streamed since it is printed once ready. Candidates are shortened
+        # unless --verbose; the markdown file always has them in full.
+        result = None
+        for event in agent.think_and_respond_stream(user_input, num_alternatives=args.alternatives, stream=False):
+            kind = event[0]
+            if kind == "initial":
+                print_thinking_item("Round 0 [INITIAL]", event[1], args.verbose)
+            elif kind == "alternative":
+                _, round_num, number, response = event
+                print_thinking_item(f"Round {round_num} [ALTERNATIVE {number}]", response, args.verbose)
+            elif kind == "selected":
+                _, round_num, response, explanation = event
+                print_thinking_item(f"Round {round_num} [SELECTED]", response, args.verbose, explanation)
+            elif kind == "final":
+                result = event[1]
 
         # Save for later use
         last_user_input = user_input
@@ -223,16 +280,6 @@ def main():
         print(f"{result['response']}")
         print("=" * 80 + "\n")
 
-        # Always show complete thinking process
-        print("\n--- COMPLETE THINKING PROCESS ---")
-        for item in result['thinking_history']:
-            print(f"\nRound {item['round']} {'[SELECTED]' if item['selected'] else '[ALTERNATIVE]'}:")
-            print(f"  Response: {item['response']}")
-            if 'explanation' in item and item['selected']:
-                print(f"  Reason for selection: {item['explanation']}")
-            print("-" * 50)
-        print("--------------------------------\n")
-
         # Always auto-save as markdown
         agent.save_response_as_markdown(user_input, result, "responses")
 
@@ -244,6 +291,7 @@ def main():
         if save_full == 'y':
             agent.save_full_log()
 
+    agent.close()
     print("Goodbye! 👋")
 
 if __name__ == "__main__":
@@ -1,10 +1,278 @@
 import os
-from typing import List, Dict, Any, Optional, Tuple
-import json
-import requests
+import sys
+import asyncio
+import contextlib
+import difflib
+import importlib.util
+import inspect
+import random
+import re
+import tempfile
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple, Iterator, AsyncIterator
+import httpx
 from datetime import datetime
 import time
 
+import jsonlib
+from response_cache import ResponseCache
+from sse import read_openai_sse
+
+try:
+    from rapidfuzz import fuzz
+except ImportError:
+    fuzz = None
+
+# Alternatives at least this similar to the current response or to each other are not worth evaluating
+DUPLICATE_SIMILARITY = 0.95
+
+# Fixed instructions are sent as leading system messages, ahead of anything that changes
+# between calls, so providers can reuse their cached processing of the prompt prefix
+ALTERNATIVE_INSTRUCTIONS = """You are given a message and the current response to it.
+Generate an alternative response that might be better. Be creative and consider different approaches.
+Reply with only the alternative response."""
+
+FUSED_ALTERNATIVES_INSTRUCTIONS = """You are given a message and the current response to it.
+Generate the requested number of alternative responses that might be better. Be creative and consider different approaches, and make the alternatives differ from each other.
+Respond with only a JSON object of the form {"alternatives": ["alternative 1", "alternative 2", ...]}."""
+
+EVALUATION_INSTRUCTIONS = """You are given a message, the current best response, and numbered alternative responses.
+Evaluate these responses and choose the best one.
+Which response best addresses the original message? Consider accuracy, clarity, and completeness.
+First, respond with ONLY 'current' or the number of the best alternative.
+Then on a new line, explain your choice in one sentence."""
+
+EVALUATE_AND_REFINE_INSTRUCTIONS = """You are given a message, the current best response, and numbered alternative responses.
+Evaluate these responses and choose the best one, considering accuracy, clarity, and completeness.
+Then generate the requested number of refinements of the chosen response that might be even better. Be creative and consider different approaches, and make the refinements differ from each other.
+Respond with only a JSON object of the form {"choice": "current" or the number of the best alternative, "explanation": "one sentence explaining the choice", "refinements": ["refinement 1", "refinement 2", ...]}."""
+
+# Per-call prompts, filled in with str.format
+ROUNDS_PROMPT = """Given this message: "{prompt}"
+
+How many rounds of iterative thinking (1-5) would be optimal to generate the best response?
+Consider the complexity and nuance required.
+Respond with just a number between 1 and 5."""
+
+ALTERNATIVE_PROMPT = """Original message: {prompt}
+
+Current response: {response}
+
+Alternative response:"""
+
+FUSED_ALTERNATIVES_PROMPT = """Original message: {prompt}
+
+Current response: {response}
+
+Number of alternatives: {count}"""
+
+EVALUATION_PROMPT = """Original message: {prompt}
+
+Current best: {current_best}
+
+Alternatives (1-{count}):
+{alternatives}"""
+
+BATCH_PROMPT = """Answer each numbered question independently.
+Respond with only a JSON object of the form {{"answers": ["answer 1", "answer 2", ...]}} containing exactly {count} answers, in order.
+
+{questions}"""
+
+# Characters replaced with underscores when a prompt is used in a filename
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s]')
+
+MARKDOWN_HEADER = """# Response to: {user_input}
+
+## Final Response
+{response}
+
+## Thinking Process
+
+**Number of thinking rounds:** {thinking_rounds}
+
+"""
+
+# Prompts shorter than these (in rough tokens of ~4 characters) get a round count without asking the model
+SIMPLE_PROMPT_TOKENS = 40
+SHORT_PROMPT_TOKENS = 120
+
+def _estimate_thinking_rounds(prompt: str) -> Optional[int]:
+    """Pick a round count for short prompts locally, or return None if the model should decide."""
+    approx_tokens = len(prompt) // 4
+    if approx_tokens < SIMPLE_PROMPT_TOKENS and "?" not in prompt and "```" not in prompt:
+        return 1
+    if approx_tokens < SHORT_PROMPT_TOKENS:
+        return 2
+    return None
+
+# Alternatives may run a little longer than the response they replace, within these bounds (in tokens)
+ALTERNATIVE_LENGTH_FACTOR = 1.3
+ALTERNATIVE_MIN_TOKENS = 256
+ALTERNATIVE_MAX_TOKENS = 4096
+
+def _alternative_token_budget(response: str, count: int = 1, limit: int = ALTERNATIVE_MAX_TOKENS) -> int:
+    """Token cap for generating `count` alternatives to a response, estimating ~4 characters per token.
+
+    The total never exceeds `limit`, the most output the provider accepts in one call.
+    """
+    per_alternative = int(len(response) // 4 * ALTERNATIVE_LENGTH_FACTOR)
+    return min(count * min(max(per_alternative, ALTERNATIVE_MIN_TOKENS), ALTERNATIVE_MAX_TOKENS), limit)
+
+def _extract_json(text: str) -> Any:
+    """Parse a JSON object from a model response, ignoring surrounding prose or code fences.
+
+    Returns None if no valid JSON object is found.
+    """
+    if not isinstance(text, str):
+        return None
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        return jsonlib.loads(text[start:end + 1])
+    except (jsonlib.JSONDecodeError, ValueError):
+        return None
+
+# Messages of conversation history sent with each turn's prompt
+CONVERSATION_HISTORY_MAX_MESSAGES = 10
+
+# Turns of the full thinking log kept in memory; older turns are kept on disk, in the JSONL
+# log file if one is set and otherwise in a temporary file for the session
+THINKING_LOG_MAX_ENTRIES = 100
+
+# Transient failures worth retrying, and how many times. Read timeouts are not
+# retried: the server may still be generating, and a retry would pay for it again.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+MAX_RETRIES = 3
+
+# Upper bound on a server's Retry-After, in seconds
+MAX_RETRY_AFTER = 60.0
+
+# Fail fast on unreachable hosts, but leave long generations time to finish
+HTTP_TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry number `attempt` (from 0).
+
+    A numeric Retry-After header from the server wins, capped at
+    MAX_RETRY_AFTER; otherwise the delay backs off exponentially with a
+    little jitter.
+    """
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_AFTER)
+        except ValueError:
+            pass
+    return 0.5 * 2 ** attempt + random.random() * 0.25
+
+def _http2_available() -> bool:
+    """Check whether httpx can speak HTTP/2, which needs the optional h2 package."""
+    return importlib.util.find_spec("h2") is not None
+
+_shared_http_client = None
+_shared_http_client_lock = threading.Lock()
+
+def shared_http_client():
+    """Return the process-wide HTTP client shared by provider SDK clients.
+
+    Agents talking to the same host then reuse one warm connection pool
+    instead of each SDK client opening its own. Requests are multiplexed
+    over HTTP/2 when h2 is installed.
+    """
+    global _shared_http_client
+    with _shared_http_client_lock:
+        if _shared_http_client is None:
+            _shared_http_client = httpx.Client(
+                http2=_http2_available(),
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(max_keepalive_connections=32)
+            )
+        return _shared_http_client
+
+async def _next_event(events: AsyncIterator[Tuple]) -> Tuple:
+    """Await the next item of an async iterator, for driving it from synchronous code."""
+    return await anext(events)
+
+def _similarity_at_least(a: str, b: str, threshold: float) -> bool:
+    """Check whether two texts are at least `threshold` (0-1) similar.
+
+    Uses rapidfuzz when it is installed. Otherwise difflib compares the texts
+    word by word, since its matching is quadratic in the worst case and long
+    responses have several times fewer words than characters, with its cheap
+    upper bounds checked first.
+    """
+    if a == b:
+        return True
+    if fuzz is not None:
+        return fuzz.ratio(a, b) >= threshold * 100
+    matcher = difflib.SequenceMatcher(None, a.split(), b.split(), autojunk=False)
+    return (matcher.real_quick_ratio() >= threshold
+            and matcher.quick_ratio() >= threshold
+            and matcher.ratio() >= threshold)
+
+def _distinct_alternatives(current_best: str, alternatives: List[str], threshold: float) -> List[int]:
+    """Indices of the alternatives less than `threshold` similar to the current best and to each other."""
+    distinct = []
+    for i, alt in enumerate(alternatives):
+        if not any(_similarity_at_least(alt, seen, threshold)
+                   for seen in [current_best, *(alternatives[j] for j in distinct)]):
+            distinct.append(i)
+    return distinct
+
+def new_async_http_client():
+    """Create an async HTTP client, multiplexing requests over HTTP/2 when h2 is installed."""
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    )
+
+class _StreamPrinter:
+    """Echo streamed tokens to stdout in batches rather than one write per token."""
+
+    def __init__(self, enabled: bool = True, max_chars: int = 64, max_delay: float = 0.05):
+        """Initialize the printer.
+
+        Args:
+            enabled: Whether anything should be written at all
+            max_chars: Number of buffered characters that triggers a write
+            max_delay: Seconds after the last write at which buffered text is written out
+        """
+        self.enabled = enabled
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self._buffer = []
+        self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, text: str):
+        """Buffer a chunk, writing the buffer out when it is large or stale, or a line ends."""
+        if not self.enabled:
+            return
+        self._buffer.append(text)
+        self._buffered_chars += len(text)
+        if (self._buffered_chars >= self.max_chars or "\n" in text
+                or time.monotonic() - self._last_flush >= self.max_delay):
+            self.flush()
+
+    def flush(self):
+        """Write out any buffered chunks."""
+        if self._buffer:
+            sys.stdout.write("".join(self._buffer))
+            sys.stdout.flush()
+            self._buffer.clear()
+            self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush the remaining chunks and end the line."""
+        if self.enabled:
+            self._buffer.append("\n")
+            self.flush()
+
 class BaseRecursiveThinkingAgent:
     """Base class for recursive thinking agents with common functionality."""
 
@@ -17,8 +285,32 @@ class BaseRecursiveThinkingAgent:
         """
         self.api_key = api_key
         self.use_openrouter = use_openrouter
-        self.conversation_history = []
-        self.full_thinking_log = []
+        self.model = None
+        # Bounded, so the oldest messages drop off as new ones are appended
+        self.conversation_history = deque(maxlen=CONVERSATION_HISTORY_MAX_MESSAGES)
+        self.full_thinking_log = deque(maxlen=THINKING_LOG_MAX_ENTRIES)
+        # Optional JSONL file each turn's thinking log entry is appended to as it completes
+        self.thinking_log_path = None
+        self._thinking_log_file = None
+        self._thinking_log_start = 0
+        # Temporary file holding turns that are in neither memory nor the JSONL log file
+        self._thinking_log_spill = None
+        self.quiet = False
+        self._async_clients = {}
+
+        # Responses to near-deterministic requests, such as the round-count (0.3) and
+        # evaluation (0.2) calls, are reused instead of re-querying the model
+        self.response_cache = ResponseCache()
+        self.cache_max_temperature = 0.3
+        # Optional SemanticCache reusing round counts for rephrased prompts
+        self.semantic_cache = None
+        # Largest max_tokens requested for generated text; subclasses raise it for providers that allow more
+        self.max_output_tokens = 4096
+        # Choose the round count for short prompts without a model call
+        self.estimate_rounds_locally = True
+        # Request all of a round's alternatives in one call instead of one call each; after
+        # the first round, that call is the previous round's evaluation
+        self.fuse_alternatives = True
 
         # OpenRouter configuration
         self.openrouter_base_url = "https://openrouter.ai/api/v1/chat/completions"
@@ -28,8 +320,43 @@ class BaseRecursiveThinkingAgent:
             "X-Title": "Recursive Thinking Chat",
             "Content-Type": "application/json"
         }
+        # Fields shared by every OpenRouter request, merged into each payload
+        self._openrouter_payload_template = {
+            "reasoning": {
+                "max_tokens": 10386,
+            }
+        }
 
-    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True) -> str:
+        # Persistent HTTP client so the many sequential calls made while thinking
+        # reuse pooled keep-alive connections instead of a new TLS handshake each time,
+        # multiplexed over HTTP/2 when h2 is installed
+        self._http = httpx.Client(
+            http2=_http2_available(),
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=32)
+        )
+
+    def _print(self, *args, **kwargs):
+        """Print progress output unless the agent has been silenced."""
+        if not self.quiet:
+            print(*args, **kwargs)
+
+    def _stream_printer(self) -> "_StreamPrinter":
+        """Create a printer for echoing a streamed response."""
+        return _StreamPrinter(enabled=not self.quiet)
+
+    def close(self):
+        """Release pooled HTTP connections, the response cache and the thinking log file held by the agent."""
+        self._http.close()
+        self.response_cache.close()
+        if self._thinking_log_file is not None:
+            self._thinking_log_file.close()
+            self._thinking_log_file = None
+        if self._thinking_log_spill is not None:
+            self._thinking_log_spill.close()
+            self._thinking_log_spill = None
+
+    def _call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
         """Make an API call to the LLM service.
 
         This method should be implemented by subclasses.
@@ -38,80 +365,416 @@ class BaseRecursiveThinkingAgent:
             messages: List of message dictionaries with role and content
             temperature: Temperature for response generation
             stream: Whether to stream the response
+            **options: Provider-neutral request options. Supported keys:
+                json_mode (bool): ask the model for a JSON object response
+                max_tokens (int): cap the length of the response
+                stop (List[str]): sequences that end the response
+                reasoning (bool): False turns off the model's extended reasoning, where
+                    the provider supports it (default True)
 
         Returns:
             The generated response as a string
         """
         raise NotImplementedError("Subclasses must implement _call_api")
 
-    def _determine_thinking_rounds(self, prompt: str) -> int:
-        """Let the model decide how many rounds of thinking are needed."""
-        meta_prompt = f"""Given this message: "{prompt}"
+    @staticmethod
+    def _meta_messages(content: str, instructions: Optional[str] = None) -> List[Dict]:
+        """Build the messages for an internal call, which is sent without the conversation history.
 
-How many rounds of iterative thinking (1-5) would be optimal to generate the best response?
-Consider the complexity and nuance required.
-Respond with just a number between 1 and 5."""
+        Args:
+            content: The per-call user message
+            instructions: Fixed instructions sent ahead of it as a system message
 
-        messages = [{"role": "user", "content": meta_prompt}]
+        Returns:
+            The messages for the call
+        """
+        messages = [{"role": "user", "content": content}]
+        if instructions is not None:
+            messages.insert(0, {"role": "system", "content": instructions})
+        return messages
 
-        print("\n=== DETERMINING THINKING ROUNDS ===")
-        response = self._call_api(messages, temperature=0.3, stream=True)
-        print("=" * 50 + "\n")
+    async def _adetermine_thinking_rounds(self, prompt: str) -> int:
+        """Let the model decide how many rounds of thinking are needed.
 
-        try:
-            rounds = int(''.join(filter(str.isdigit, response)))
-            return min(max(rounds, 1), 5)
-        except:
+        Short prompts are answered from a local estimate when estimate_rounds_locally
+        is set. With a semantic cache, the decision made for an earlier prompt with
+        the same meaning is reused without calling the model.
+        """
+        if self.estimate_rounds_locally:
+            rounds = _estimate_thinking_rounds(prompt)
+            if rounds is not None:
+                return rounds
+
+        if self.semantic_cache is not None:
+            # Embedding the prompt (and loading the model on first use) blocks, so keep it off the loop
+            rounds = await asyncio.to_thread(self.semantic_cache.get, prompt)
+            if rounds is not None:
+                return rounds
+
+        messages = self._meta_messages(ROUNDS_PROMPT.format(prompt=prompt))
+
+        self._print("\n=== DETERMINING THINKING ROUNDS ===")
+        # Only a single digit is needed, so generation stops right after it
+        response = await self._acached_call_api(messages, temperature=0.3, stream=False, max_tokens=5, stop=["\n"],
+                                                 reasoning=False)
+        self._print("=" * 50 + "\n")
+
+        # The first standalone digit, so "between 2 and 4" doesn't read as 24
+        match = re.search(r'\b([1-5])\b', response or "")
+        if match is None:
             return 3
+        rounds = int(match.group(1))
 
-    def _generate_alternatives(self, base_response: str, prompt: str, num_alternatives: int = 3) -> List[str]:
-        """Generate alternative responses.
+        if self.semantic_cache is not None:
+            await asyncio.to_thread(self.semantic_cache.put, prompt, rounds)
+        return rounds
+
+    async def _acached_call_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True,
+                                **options) -> str:
+        """Call _acall_api, serving repeated deterministic requests from the response cache.
+
+        Only requests with a temperature at or below cache_max_temperature are
+        cached, since sampling at higher temperatures is meant to vary.
+        """
+        if temperature > self.cache_max_temperature:
+            return await self._acall_api(messages, temperature, stream, **options)
+
+        key = self.response_cache.make_key(self.model, messages, temperature, options)
+        cached = self._cached_response(key, stream)
+        if cached is not None:
+            return cached
+
+        response = await self._acall_api(messages, temperature, stream, **options)
+        self._cache_response(key, response)
+        return response
+
+    def _cached_response(self, key: str, stream: bool) -> Optional[str]:
+        """Look up a cached response, echoing it as if streamed when streaming was requested."""
+        cached = self.response_cache.get(key)
+        if cached is not None and stream:
+            printer = self._stream_printer()
+            printer.write(cached)
+            printer.close()
+        return cached
+
+    def _cache_response(self, key: str, response: str):
+        """Store a response in the cache unless the call failed or returned nothing."""
+        if isinstance(response, str) and response and not response.startswith("Error:"):
+            self.response_cache.put(key, response)
+
+    def _openrouter_payload(self, messages: List[Dict], temperature: float, stream: bool, options: Dict) -> Dict:
+        """Build the request body for an OpenRouter chat completion."""
+        payload = self._openrouter_payload_template | {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": stream
+        }
+        payload.update(self._chat_completion_options(options))
+        if not options.get("reasoning", True):
+            payload.pop("reasoning", None)
+        elif "reasoning" in payload:
+            # OpenRouter counts reasoning tokens against max_tokens, so a cap sized for the answer
+            # would cut the reasoning short; the reasoning budget bounds these calls instead
+            payload.pop("max_tokens", None)
+        return payload
+
+    def _call_openrouter_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = True, **options) -> str:
+        """Make an API call to OpenRouter."""
+        payload = self._openrouter_payload(messages, temperature, stream, options)
+
+        try:
+            with self._post_with_retries(
+                    self.openrouter_base_url,
+                    headers=self.openrouter_headers,
+                    content=jsonlib.dumps(payload)
+            ) as response:
+                response.raise_for_status()
+
+                if stream:
+                    return self._stream_chat_completion(response)
+                else:
+                    return self._completion_content(response.read())
+        except Exception as e:
+            print(f"OpenRouter API Error: {e}")
+            return "Error: Could not get response from OpenRouter API"
+
+    @contextlib.contextmanager
+    def _post_with_retries(self, url: str, **kwargs) -> Iterator[httpx.Response]:
+        """POST with the agent's HTTP client, retrying transient failures with backoff.
+
+        Rate limits, server errors and failed connections are retried, honouring
+        Retry-After. The body is not read up front, so the caller can stream it;
+        the response is closed when the with block exits.
 
         Args:
-            base_response: The current best response
-            prompt: The original user prompt
-            num_alternatives: Number of alternative responses to generate
+            url: URL to post to
+            **kwargs: Further arguments for building the request
+
+        Yields:
+            The last response received; a final error status is left for the caller to raise
+        """
+        request = self._http.build_request("POST", url, **kwargs)
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = self._http.send(request, stream=True)
+            except RETRY_EXCEPTIONS:
+                if attempt == MAX_RETRIES:
+                    raise
+                time.sleep(_retry_delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                break
+            response.close()
+            time.sleep(_retry_delay(attempt, response.headers.get("Retry-After")))
+
+        try:
+            yield response
+        finally:
+            response.close()
+
+    @staticmethod
+    def _chat_completion_options(options: Dict) -> Dict:
+        """Translate request options into OpenAI-compatible chat completion fields."""
+        fields = {}
+        if options.get("json_mode"):
+            fields["response_format"] = {"type": "json_object"}
+        if "max_tokens" in options:
+            fields["max_tokens"] = options["max_tokens"]
+        if options.get("stop"):
+            fields["stop"] = options["stop"]
+        return fields
+
+    @staticmethod
+    def _message_text(content: Optional[str]) -> str:
+        """Normalise a completion's message content, which is null for refusals and tool calls."""
+        return (content or "").strip()
+
+    @classmethod
+    def _completion_content(cls, body: bytes) -> str:
+        """Extract the message text from a non-streamed chat completion body."""
+        return cls._message_text(jsonlib.loads(body)["choices"][0]["message"]["content"])
+
+    def _stream_chat_completion(self, response: httpx.Response) -> str:
+        """Read an OpenAI-compatible event stream, echoing content as it arrives.
+
+        Args:
+            response: A streaming HTTP response
 
         Returns:
-            A list of alternative responses
+            The full streamed content
         """
-        alternatives = []
+        printer = self._stream_printer()
+        content = read_openai_sse(response.iter_bytes(), on_token=printer.write)
+        printer.close()
+        return content
 
-        for i in range(num_alternatives):
-            print(f"\n=== GENERATING ALTERNATIVE {i+1}/{num_alternatives} ===")
-            alt_prompt = f"""Original message: {prompt}
+    async def _acall_api(self, messages: List[Dict], temperature: float = 0.7, stream: bool = False, **options) -> str:
+        """Async counterpart of _call_api.
 
-Current response: {base_response}
+        Subclasses with an async client should override this. The default sends
+        non-streaming OpenRouter requests with an async HTTP client and runs
+        everything else through the blocking _call_api in a worker thread.
 
-Generate an alternative response that might be better. Be creative and consider different approaches.
-Alternative response:"""
+        Args:
+            messages: List of message dictionaries with role and content
+            temperature: Temperature for response generation
+            stream: Whether to stream the response
+            **options: Request options, as for _call_api
 
-            messages = self.conversation_history + [{"role": "user", "content": alt_prompt}]
-            alternative = self._call_api(messages, temperature=0.7 + i * 0.1, stream=True)
-            alternatives.append(alternative)
-            print("=" * 50)
+        Returns:
+            The generated response as a string
+        """
+        if self.use_openrouter and not stream:
+            return await self._acall_openrouter_api(messages, temperature, **options)
+        return await asyncio.to_thread(self._call_api, messages, temperature, stream, **options)
 
-        return alternatives
+    async def _asample_api(self, messages: List[Dict], temperature: float, count: int,
+                           **options) -> Optional[List[str]]:
+        """Sample several completions of the same messages with a single request.
 
-    def _evaluate_responses(self, prompt: str, current_best: str, alternatives: List[str]) -> Tuple[str, str]:
-        """Evaluate responses and select the best one."""
-        print("\n=== EVALUATING RESPONSES ===")
-        eval_prompt = f"""Original message: {prompt}
+        The prompt is then processed once for all samples. Subclasses whose API
+        can return several choices per request should override this.
 
-Evaluate these responses and choose the best one:
+        Args:
+            messages: List of message dictionaries with role and content
+            temperature: Temperature for every sample
+            count: Number of completions to sample
+            **options: Request options, as for _call_api
 
-Current best: {current_best}
+        Returns:
+            The sampled responses, or None if the provider cannot sample several
+            completions at once or the request failed
+        """
+        return None
 
-Alternatives:
-{chr(10).join([f"{i+1}. {alt}" for i, alt in enumerate(alternatives)])}
+    async def _acall_openrouter_api(self, messages: List[Dict], temperature: float = 0.7, **options) -> str:
+        """Make a non-blocking, non-streaming API call to OpenRouter."""
+        payload = self._openrouter_payload(messages, temperature, False, options)
 
-Which response best addresses the original message? Consider accuracy, clarity, and completeness.
-First, respond with ONLY 'current' or a number (1-{len(alternatives)}).
-Then on a new line, explain your choice in one sentence."""
+        try:
+            client = self._get_async_client("openrouter", new_async_http_client)
+            response = await self._apost_with_retries(
+                client,
+                self.openrouter_base_url,
+                headers=self.openrouter_headers,
+                content=jsonlib.dumps(payload)
+            )
+            response.raise_for_status()
+            return self._completion_content(response.content)
+        except Exception as e:
+            print(f"OpenRouter API Error: {e}")
+            return "Error: Could not get response from OpenRouter API"
+
+    @staticmethod
+    async def _apost_with_retries(client, url: str, **kwargs):
+        """POST with an async HTTP client, retrying transient failures with backoff.
 
-        messages = [{"role": "user", "content": eval_prompt}]
-        evaluation = self._call_api(messages, temperature=0.2, stream=True)
-        print("=" * 50)
+        Args:
+            client: An httpx.AsyncClient
+            url: URL to post to
+            **kwargs: Further arguments for client.post
+
+        Returns:
+            The last response received; a final error status is left for the caller to raise
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = await client.post(url, **kwargs)
+            except RETRY_EXCEPTIONS:
+                if attempt == MAX_RETRIES:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            await asyncio.sleep(_retry_delay(attempt, response.headers.get("Retry-After")))
+
+    async def _aclose_async_clients(self):
+        """Close the async clients created on the running event loop."""
+        loop = asyncio.get_running_loop()
+        for name, (client_loop, client) in list(self._async_clients.items()):
+            if client_loop is loop:
+                del self._async_clients[name]
+                close = getattr(client, "aclose", None) or getattr(client, "close", None)
+                if close is not None and inspect.isawaitable(result := close()):
+                    await result
+
+    def _get_async_client(self, name: str, factory):
+        """Return an async client bound to the running event loop.
+
+        Async clients cannot be shared between event loops, so one is created
+        per loop and reused for every call made within it.
+        """
+        loop = asyncio.get_running_loop()
+        cached = self._async_clients.get(name)
+        if cached is None or cached[0] is not loop:
+            cached = (loop, factory())
+            self._async_clients[name] = cached
+        return cached[1]
+
+    async def _agenerate_alternatives(self, base_response: str, prompt: str, num_alternatives: int = 3) -> List[str]:
+        """Generate alternative responses.
+
+        Providers that can sample several completions of one prompt return them
+        all from a single request. Otherwise, with fuse_alternatives set, all
+        alternatives are requested in one call returning JSON; failing that, each
+        is requested separately and concurrently.
+
+        Args:
+            base_response: The current best response
+            prompt: The original user prompt
+            num_alternatives: Number of alternative responses to generate
+
+        Returns:
+            A list of alternative responses
+        """
+        self._print(f"\n=== GENERATING {num_alternatives} ALTERNATIVES ===")
+        alt_prompt = ALTERNATIVE_PROMPT.format(prompt=prompt, response=base_response)
+        messages = self._meta_messages(alt_prompt, ALTERNATIVE_INSTRUCTIONS)
+        max_tokens = _alternative_token_budget(base_response, limit=self.max_output_tokens)
+
+        alternatives = None
+        if num_alternatives > 1:
+            # One sampling temperature for all, in the middle of the range used for separate calls
+            alternatives = await self._asample_api(messages, 0.85, num_alternatives, max_tokens=max_tokens)
+        if alternatives is None and self.fuse_alternatives and num_alternatives > 1:
+            alternatives = await self._agenerate_fused_alternatives(base_response, prompt, num_alternatives)
+
+        if alternatives is None:
+            # Streaming is off: interleaved tokens from concurrent alternatives are unreadable
+            alternatives = list(await asyncio.gather(*[
+                self._acall_api(messages, temperature=0.7 + i * 0.1, stream=False, max_tokens=max_tokens)
+                for i in range(num_alternatives)
+            ]))
+        self._print("=" * 50)
+
+        return alternatives
+
+    async def _agenerate_fused_alternatives(self, base_response: str, prompt: str,
+                                            num_alternatives: int) -> Optional[List[str]]:
+        """Generate all alternatives with a single JSON call.
+
+        Returns:
+            The alternatives, or None if the reply does not hold enough of them
+        """
+        alt_prompt = FUSED_ALTERNATIVES_PROMPT.format(prompt=prompt, response=base_response, count=num_alternatives)
+        messages = self._meta_messages(alt_prompt, FUSED_ALTERNATIVES_INSTRUCTIONS)
+        max_tokens = _alternative_token_budget(base_response, num_alternatives, self.max_output_tokens)
+        response = await self._acall_api(messages, temperature=0.8, stream=False, json_mode=True,
+                                         max_tokens=max_tokens)
+
+        parsed = _extract_json(response)
+        if isinstance(parsed, dict):
+            alternatives = parsed.get("alternatives")
+            if isinstance(alternatives, list) and len(alternatives) >= num_alternatives:
+                return [str(alternative) for alternative in alternatives[:num_alternatives]]
+        return None
+
+    async def _aevaluate_responses(self, prompt: str, current_best: str, alternatives: List[str],
+                                   num_refinements: int = 0) -> Tuple[Optional[int], str, Optional[List[str]]]:
+        """Evaluate responses and select the best one.
+
+        Args:
+            prompt: The original user prompt
+            current_best: The current best response
+            alternatives: The alternative responses to compare against it
+            num_refinements: Number of refined alternatives to request in the same
+                call, for use as the next round's alternatives
+
+        Returns:
+            The index into alternatives of the selected response, or None to keep the
+            current best, the explanation for the choice, and the refined alternatives,
+            or None if none were requested or returned
+        """
+        # Indices of the alternatives worth evaluating, in the order they are numbered to the model.
+        # Comparing long texts is CPU-bound, so it runs off the event loop
+        distinct = await asyncio.to_thread(_distinct_alternatives, current_best, alternatives, DUPLICATE_SIMILARITY)
+        if not distinct:
+            self._print("\n=== ALTERNATIVES MATCH THE CURRENT RESPONSE, KEEPING IT ===")
+            return None, "The alternatives were nearly identical to the current response", None
+        candidates = [alternatives[i] for i in distinct]
+
+        self._print("\n=== EVALUATING RESPONSES ===")
+        eval_prompt = EVALUATION_PROMPT.format(
+            prompt=prompt,
+            current_best=current_best,
+            count=len(candidates),
+            alternatives="\n".join([f"{i+1}. {alt}" for i, alt in enumerate(candidates)])
+        )
+
+        if num_refinements > 0:
+            longest = max([current_best, *candidates], key=len)
+            max_tokens = _alternative_token_budget(longest, num_refinements, self.max_output_tokens)
+            fused = await self._aevaluate_and_refine(eval_prompt, len(candidates), num_refinements, max_tokens)
+            if fused is not None:
+                self._print("=" * 50)
+                number, explanation, refinements = fused
+                return (distinct[number - 1] if number else None), explanation, refinements
+
+        messages = self._meta_messages(eval_prompt, EVALUATION_INSTRUCTIONS)
+        evaluation = await self._acached_call_api(messages, temperature=0.2, stream=False)
+        self._print("=" * 50)
 
         # Better parsing
         lines = [line.strip() for line in evaluation.split('\n') if line.strip()]
@@ -133,54 +796,169 @@ Then on a new line, explain your choice in one sentence."""
                 explanation = ' '.join(lines[1:])
 
         if choice == 'current':
-            return current_best, explanation
+            return None, explanation, None
         else:
             try:
                 index = int(choice) - 1
-                if 0 <= index < len(alternatives):
-                    return alternatives[index], explanation
+                if 0 <= index < len(candidates):
+                    return distinct[index], explanation, None
             except:
                 pass
 
-        return current_best, explanation
+        return None, explanation, None
+
+    async def _aevaluate_and_refine(self, eval_prompt: str, num_candidates: int, num_refinements: int,
+                                    max_tokens: int) -> Optional[Tuple[int, str, Optional[List[str]]]]:
+        """Select the best response and propose refinements of it with a single JSON call.
+
+        Returns:
+            The number (1-num_candidates) of the selected alternative, or 0 for the
+            current best, the explanation for the choice, and the refined alternatives
+            or None, or None if the reply cannot be parsed
+        """
+        messages = self._meta_messages(f"{eval_prompt}\n\nNumber of refinements: {num_refinements}",
+                                       EVALUATE_AND_REFINE_INSTRUCTIONS)
+        response = await self._acall_api(messages, temperature=0.5, stream=False, json_mode=True,
+                                         max_tokens=max_tokens)
+
+        parsed = _extract_json(response)
+        if not isinstance(parsed, dict):
+            return None
+
+        number = 0
+        choice = str(parsed.get("choice", "current")).lower()
+        if "current" not in choice:
+            digits = "".join(filter(str.isdigit, choice))
+            if digits and 0 < int(digits) <= num_candidates:
+                number = int(digits)
+        explanation = str(parsed.get("explanation") or "No explanation provided")
+
+        refinements = parsed.get("refinements")
+        if isinstance(refinements, list) and len(refinements) >= num_refinements:
+            refinements = [str(refinement) for refinement in refinements[:num_refinements]]
+        else:
+            refinements = None
+        return number, explanation, refinements
 
-    def think_and_respond(self, user_input: str, verbose: bool = True, num_alternatives: int = 3) -> Dict:
+    def think_and_respond(self, user_input: str, verbose: bool = True, num_alternatives: int = 3,
+                          stream: bool = True, convergence_threshold: Optional[float] = 0.97,
+                          max_rounds: int = 5) -> Dict:
         """Process user input with recursive thinking.
 
         Args:
             user_input: The user's input
             verbose: Whether to print verbose output
             num_alternatives: Number of alternative responses to generate in each round
+            stream: Whether to stream the initial response; internal calls are never streamed
+            convergence_threshold: Stop early once a round's best response is at least this
+                similar (0-1) to the previous one and the evaluation proposed no refinements
+                for the next round; None always runs every round
+            max_rounds: Upper bound on the number of thinking rounds
 
         Returns:
-            A dictionary containing the response, thinking rounds, and thinking history
+            A dictionary containing the response, thinking rounds completed, and thinking history
         """
-        print("\n" + "=" * 50)
-        print("🤔 RECURSIVE THINKING PROCESS STARTING")
-        print("=" * 50)
+        for event in self.think_and_respond_stream(user_input, verbose, num_alternatives, stream,
+                                                   convergence_threshold, max_rounds):
+            if event[0] == "final":
+                return event[1]
 
-        thinking_rounds = self._determine_thinking_rounds(user_input)
+    def think_and_respond_stream(self, user_input: str, verbose: bool = True, num_alternatives: int = 3,
+                                 stream: bool = True, convergence_threshold: Optional[float] = 0.97,
+                                 max_rounds: int = 5) -> Iterator[Tuple]:
+        """Process user input with recursive thinking, yielding events as the thinking progresses.
+
+        Runs athink_and_respond_stream on one event loop for the whole turn, so
+        async clients and their connections are reused from round to round.
+
+        Args:
+            user_input: The user's input
+            verbose: Whether to print verbose output
+            num_alternatives: Number of alternative responses to generate in each round
+            stream: Whether to stream the initial response; internal calls are never streamed
+            convergence_threshold: Stop early once a round's best response is at least this
+                similar (0-1) to the previous one and the evaluation proposed no refinements
+                for the next round; None always runs every round
+            max_rounds: Upper bound on the number of thinking rounds
+
+        Yields:
+            The events described in athink_and_respond_stream
+        """
+        with asyncio.Runner() as runner:
+            events = self.athink_and_respond_stream(user_input, verbose, num_alternatives, stream,
+                                                    convergence_threshold, max_rounds)
+            try:
+                while True:
+                    try:
+                        event = runner.run(_next_event(events))
+                    except StopAsyncIteration:
+                        break
+                    yield event
+            finally:
+                runner.run(events.aclose())
+                runner.run(self._aclose_async_clients())
+
+    async def athink_and_respond_stream(self, user_input: str, verbose: bool = True, num_alternatives: int = 3,
+                                        stream: bool = True, convergence_threshold: Optional[float] = 0.97,
+                                        max_rounds: int = 5) -> AsyncIterator[Tuple]:
+        """Process user input with recursive thinking, yielding events as the thinking progresses.
+
+        Events are tuples whose first item names the event:
+            ("initial", response)
+            ("round_start", round_num, thinking_rounds)
+            ("alternative", round_num, alternative_number, response)
+            ("selected", round_num, response, explanation)
+            ("final", result), with result as returned by think_and_respond
+
+        Args:
+            user_input: The user's input
+            verbose: Whether to print verbose output
+            num_alternatives: Number of alternative responses to generate in each round
+            stream: Whether to stream the initial response; internal calls are never streamed
+            convergence_threshold: Stop early once a round's best response is at least this
+                similar (0-1) to the previous one and the evaluation proposed no refinements
+                for the next round; None always runs every round
+            max_rounds: Upper bound on the number of thinking rounds
+
+        Yields:
+            Thinking events, ending with the final result
+        """
+        self._print("\n" + "=" * 50)
+        self._print("🤔 RECURSIVE THINKING PROCESS STARTING")
+        self._print("=" * 50)
+
+        thinking_rounds = min(await self._adetermine_thinking_rounds(user_input), max_rounds)
 
         if verbose:
-            print(f"\n🤔 Thinking... ({thinking_rounds} rounds needed)")
+            self._print(f"\n🤔 Thinking... ({thinking_rounds} rounds needed)")
 
         # Initial response
-        print("\n=== GENERATING INITIAL RESPONSE ===")
-        messages = self.conversation_history + [{"role": "user", "content": user_input}]
-        current_best = self._call_api(messages, stream=True)
-        print("=" * 50)
+        self._print("\n=== GENERATING INITIAL RESPONSE ===")
+        user_message = {"role": "user", "content": user_input}
+        messages = [*self.conversation_history, user_message]
+        current_best = await self._acached_call_api(messages, stream=stream)
+        self._print("=" * 50)
 
         thinking_history = [{"round": 0, "response": current_best, "selected": True}]
+        best_item = thinking_history[0]
+        yield ("initial", current_best)
 
         # Iterative improvement
+        rounds_completed = 0
+        refinements = None
         for round_num in range(1, thinking_rounds + 1):
             if verbose:
-                print(f"\n=== ROUND {round_num}/{thinking_rounds} ===")
+                self._print(f"\n=== ROUND {round_num}/{thinking_rounds} ===")
+            yield ("round_start", round_num, thinking_rounds)
 
-            # Generate alternatives
-            alternatives = self._generate_alternatives(current_best, user_input, num_alternatives)
+            # Generate alternatives, unless the previous evaluation already proposed them
+            if refinements is not None:
+                alternatives = refinements
+            else:
+                alternatives = await self._agenerate_alternatives(current_best, user_input, num_alternatives)
 
             # Store alternatives in history
+            round_start = len(thinking_history)
             for i, alt in enumerate(alternatives):
                 thinking_history.append({
                     "round": round_num,
@@ -188,69 +966,284 @@ Then on a new line, explain your choice in one sentence."""
                     "selected": False,
                     "alternative_number": i + 1
                 })
+                yield ("alternative", round_num, i + 1, alt)
 
             # Evaluate and select best
-            new_best, explanation = self._evaluate_responses(user_input, current_best, alternatives)
+            previous_best = current_best
+            num_refinements = num_alternatives if self.fuse_alternatives and round_num < thinking_rounds else 0
+            selected_index, explanation, refinements = await self._aevaluate_responses(
+                user_input, current_best, alternatives, num_refinements
+            )
 
             # Update selection in history
-            if new_best != current_best:
-                for item in thinking_history:
-                    if item["round"] == round_num and item["response"] == new_best:
-                        item["selected"] = True
-                        item["explanation"] = explanation
-                current_best = new_best
+            if selected_index is not None:
+                best_item = thinking_history[round_start + selected_index]
+                best_item["selected"] = True
+                best_item["explanation"] = explanation
+                current_best = alternatives[selected_index]
 
                 if verbose:
-                    print(f"\n    ✓ Selected alternative: {explanation}")
+                    self._print(f"\n    ✓ Selected alternative: {explanation}")
             else:
-                for item in thinking_history:
-                    if item["selected"] and item["response"] == current_best:
-                        item["explanation"] = explanation
-                        break
+                best_item["explanation"] = explanation
 
                 if verbose:
-                    print(f"\n    ✓ Kept current response: {explanation}")
+                    self._print(f"\n    ✓ Kept current response: {explanation}")
+            yield ("selected", round_num, current_best, explanation)
+
+            rounds_completed = round_num
+            # Refinements proposed by the evaluation are already paid for, so they are
+            # always evaluated next round rather than discarded by an early stop
+            if (convergence_threshold is not None and round_num < thinking_rounds and not refinements
+                    and await asyncio.to_thread(_similarity_at_least, previous_best, current_best,
+                                                convergence_threshold)):
+                if verbose:
+                    self._print(f"\n    ✓ Converged after {round_num}/{thinking_rounds} rounds")
+                break
 
-        # Add to conversation history
-        self.conversation_history.append({"role": "user", "content": user_input})
+        # Add to conversation history, reusing the turn's user message
+        self.conversation_history.append(user_message)
         self.conversation_history.append({"role": "assistant", "content": current_best})
 
-        # Keep conversation history manageable
-        if len(self.conversation_history) > 10:
-            self.conversation_history = self.conversation_history[-10:]
-
         # Add to full thinking log
-        self.full_thinking_log.append({
+        self._log_thinking({
             "timestamp": datetime.now().isoformat(),
             "user_input": user_input,
             "final_response": current_best,
-            "thinking_rounds": thinking_rounds,
+            "thinking_rounds": rounds_completed,
             "thinking_history": thinking_history
         })
 
-        print("\n" + "=" * 50)
-        print("🎯 FINAL RESPONSE SELECTED")
-        print("=" * 50)
+        self._print("\n" + "=" * 50)
+        self._print("🎯 FINAL RESPONSE SELECTED")
+        self._print("=" * 50)
 
         result = {
             "response": current_best,
-            "thinking_rounds": thinking_rounds,
+            "thinking_rounds": rounds_completed,
             "thinking_history": thinking_history
         }
 
-        return result
+        yield ("final", result)
+
+    async def athink_and_respond(self, user_input: str, verbose: bool = True, num_alternatives: int = 3,
+                                 quiet: bool = True, **kwargs) -> Dict:
+        """Async variant of think_and_respond.
+
+        Several agents can be awaited together with asyncio.gather. The async
+        clients opened for the call are closed before it returns.
+
+        Args:
+            user_input: The user's input
+            verbose: Whether to print verbose output
+            num_alternatives: Number of alternative responses to generate in each round
+            quiet: Suppress streamed output, which would interleave between concurrent agents
+            **kwargs: Further keyword arguments for athink_and_respond_stream
+
+        Returns:
+            The same dictionary as think_and_respond
+        """
+        previous_quiet = self.quiet
+        self.quiet = quiet
+        try:
+            async for event in self.athink_and_respond_stream(user_input, verbose, num_alternatives, **kwargs):
+                if event[0] == "final":
+                    return event[1]
+        finally:
+            self.quiet = previous_quiet
+            await self._aclose_async_clients()
+
+    def think_and_respond_many(self, prompts: List[str]) -> List[Dict]:
+        """Answer several independent prompts with a single API call.
+
+        This trades latency for cost: the shared request overhead is paid once,
+        but no answer is available until all of them have been generated. For
+        low latency, await athink_and_respond for each prompt with asyncio.gather
+        instead. Answers are not refined by recursive thinking. If the batched
+        reply cannot be parsed, each prompt is sent as its own concurrent request.
+
+        Args:
+            prompts: The independent user inputs to answer
+
+        Returns:
+            One result dictionary per prompt, in the same shape as think_and_respond
+        """
+        answers = None
+        if len(prompts) > 1:
+            numbered = "\n".join(f"{i+1}. {prompt}" for i, prompt in enumerate(prompts))
+            batch_prompt = BATCH_PROMPT.format(count=len(prompts), questions=numbered)
+            messages = [{"role": "user", "content": batch_prompt}]
+            self._print(f"\n=== ANSWERING {len(prompts)} PROMPTS IN ONE REQUEST ===")
+            response = self._call_api(messages, temperature=0.7, stream=False, json_mode=True)
+
+            parsed = _extract_json(response)
+            if isinstance(parsed, dict):
+                batch = parsed.get("answers")
+                if isinstance(batch, list) and len(batch) == len(prompts):
+                    answers = [str(answer) for answer in batch]
+
+        if answers is None:
+            answers = asyncio.run(self._aanswer_each(prompts))
+
+        return [
+            {
+                "response": answer,
+                "thinking_rounds": 0,
+                "thinking_history": [{"round": 0, "response": answer, "selected": True}]
+            }
+            for answer in answers
+        ]
+
+    async def _aanswer_each(self, prompts: List[str]) -> List[str]:
+        """Answer each prompt with its own request, all sent concurrently.
+
+        The async clients opened for the requests are closed before it returns,
+        as they are bound to this event loop.
+        """
+        try:
+            return list(await asyncio.gather(*[
+                self._acall_api([{"role": "user", "content": prompt}], stream=False)
+                for prompt in prompts
+            ]))
+        finally:
+            await self._aclose_async_clients()
+
+    def submit_batch(self, prompts: List[str]) -> str:
+        """Submit independent prompts to the provider's batch API.
+
+        Batch APIs are billed at a discount but may take up to 24 hours to
+        complete, so they suit offline runs with no latency requirement.
+
+        Args:
+            prompts: The independent user inputs to answer
+
+        Returns:
+            The provider's batch identifier
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch requests")
+
+    def fetch_batch(self, batch_id: str) -> Optional[List[str]]:
+        """Fetch the results of a submitted batch.
+
+        Args:
+            batch_id: The identifier returned by submit_batch
+
+        Returns:
+            The responses in prompt order, or None if the batch is still running
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch requests")
+
+    def think_and_respond_batch(self, prompts: List[str], poll_interval: float = 60.0) -> List[Dict]:
+        """Answer prompts through the provider's batch API, waiting for the results.
+
+        Responses are neither streamed nor refined by recursive thinking.
+
+        Args:
+            prompts: The independent user inputs to answer
+            poll_interval: Seconds to wait between status checks
+
+        Returns:
+            One result dictionary per prompt, in the same shape as think_and_respond
+        """
+        batch_id = self.submit_batch(prompts)
+        self._print(f"Submitted batch {batch_id} with {len(prompts)} prompts")
+
+        responses = self.fetch_batch(batch_id)
+        while responses is None:
+            time.sleep(poll_interval)
+            responses = self.fetch_batch(batch_id)
+
+        return [
+            {
+                "response": response,
+                "thinking_rounds": 0,
+                "thinking_history": [{"round": 0, "response": response, "selected": True}]
+            }
+            for response in responses
+        ]
+
+    def _log_thinking(self, entry: Dict):
+        """Record a turn in the full thinking log, appending it to the JSONL log file if one is set.
+
+        Each turn is written as one line when it completes, so the file holds
+        every turn even though only the most recent are kept in memory. Without
+        a log file, turns evicted from memory are spilled to a temporary file
+        instead, so save_full_log still writes every turn.
+        """
+        if self._thinking_log_file is not None and self._thinking_log_file.name != self.thinking_log_path:
+            # The log file was changed or unset, so move the turns written to it to the spill
+            # file; the ones still in memory are dropped there so they are not saved twice
+            self._spill_thinking_log(self._thinking_log_entries(include_spilled=False))
+            self._thinking_log_file.close()
+            self._thinking_log_file = None
+            self.full_thinking_log.clear()
+
+        if self.thinking_log_path is None:
+            if len(self.full_thinking_log) == self.full_thinking_log.maxlen:
+                self._spill_thinking_log([self.full_thinking_log[0]])
+            self.full_thinking_log.append(entry)
+            return
+
+        if self._thinking_log_file is None:
+            # Turns logged before the file was set are not in it
+            self._spill_thinking_log(list(self.full_thinking_log))
+            self._thinking_log_file = open(self.thinking_log_path, 'ab')
+            # The file may hold earlier sessions; this one's turns start here
+            self._thinking_log_start = self._thinking_log_file.tell()
+        self.full_thinking_log.append(entry)
+        self._thinking_log_file.write(jsonlib.dumps(entry) + b"\n")
+        self._thinking_log_file.flush()
+
+    def _spill_thinking_log(self, entries: List[Dict]):
+        """Append thinking log entries to the session's temporary spill file."""
+        if not entries:
+            return
+        if self._thinking_log_spill is None:
+            self._thinking_log_spill = tempfile.TemporaryFile(prefix="thinking_log_", suffix=".jsonl")
+        self._thinking_log_spill.seek(0, os.SEEK_END)
+        self._thinking_log_spill.writelines(jsonlib.dumps(entry) + b"\n" for entry in entries)
+        self._thinking_log_spill.flush()
+
+    def _thinking_log_entries(self, include_spilled: bool = True) -> List[Dict]:
+        """Return every turn of the session's thinking log, in order.
+
+        Args:
+            include_spilled: Whether to include turns held in the spill file
+
+        Returns:
+            The spilled turns followed by those in the JSONL log file if one is
+            in use, or else those in memory
+        """
+        entries = []
+        if include_spilled and self._thinking_log_spill is not None:
+            self._thinking_log_spill.seek(0)
+            entries.extend(jsonlib.loads(line) for line in self._thinking_log_spill if line.strip())
+        if self._thinking_log_file is None:
+            entries.extend(self.full_thinking_log)
+            return entries
+        with open(self._thinking_log_file.name, 'rb') as f:
+            f.seek(self._thinking_log_start)
+            entries.extend(jsonlib.loads(line) for line in f if line.strip())
+        return entries
 
     def save_full_log(self, filename: str = None):
-        """Save the full thinking process log."""
+        """Save the full thinking process log.
+
+        The log includes turns that are no longer kept in memory, read back from
+        the JSONL log file or the session's spill file.
+        """
         if filename is None:
             filename = f"full_thinking_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump({
-                "conversation": self.conversation_history,
-                "full_thinking_log": self.full_thinking_log,
+        if self._thinking_log_file is not None and os.path.abspath(filename) == os.path.abspath(
+                self._thinking_log_file.name):
+            raise ValueError(f"Cannot save the full thinking log over its JSONL log file {filename}")
+
+        with open(filename, 'wb') as f:
+            f.write(jsonlib.dumps_indented({
+                "conversation": list(self.conversation_history),
+                "full_thinking_log": self._thinking_log_entries(),
                 "timestamp": datetime.now().isoformat()
-            }, f, indent=2, ensure_ascii=False)
+            }))
 
         print(f"Full thinking log saved to {filename}")
 
@@ -259,11 +1252,11 @@ Then on a new line, explain your choice in one sentence."""
         if filename is None:
             filename = f"chat_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump({
-                "conversation": self.conversation_history,
+        with open(filename, 'wb') as f:
+            f.write(jsonlib.dumps_indented({
+                "conversation": list(self.conversation_history),
                 "timestamp": datetime.now().isoformat()
-            }, f, indent=2, ensure_ascii=False)
+            }))
 
         print(f"Conversation saved to {filename}")
 
@@ -280,34 +1273,26 @@ Then on a new line, explain your choice in one sentence."""
 
         # Create a truncated version of the user input for the filename
         # Remove special characters and limit to 30 characters
-        safe_input = ''.join(c if c.isalnum() or c.isspace() else '_' for c in user_input)
-        truncated_input = safe_input[:30].strip().replace(' ', '_')
+        safe_input = UNSAFE_FILENAME_CHARS.sub('_', user_input[:30])
+        truncated_input = safe_input.strip().replace(' ', '_')
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"{folder}/{truncated_input}_{timestamp}.md"
 
-        # Create the markdown content
-        markdown = f"""# Response to: {user_input}
-
-## Final Response
-{result['response']}
-
-## Thinking Process
-
-**Number of thinking rounds:** {result['thinking_rounds']}
-
-"""
+        # Create the markdown content, collecting the pieces to write in one go
+        parts = [MARKDOWN_HEADER.format(user_input=user_input, response=result['response'],
+                                        thinking_rounds=result['thinking_rounds'])]
 
         # Add the thinking history
         for item in result['thinking_history']:
             selection_status = "✅ SELECTED" if item['selected'] else "❌ ALTERNATIVE"
-            markdown += f"### Round {item['round']} - {selection_status}\n\n"
-            markdown += f"{item['response']}\n\n"
+            parts.append(f"### Round {item['round']} - {selection_status}\n\n")
+            parts.append(f"{item['response']}\n\n")
             if 'explanation' in item and item['selected']:
-                markdown += f"**Reason for selection:** {item['explanation']}\n\n"
-            markdown += "---\n\n"
+                parts.append(f"**Reason for selection:** {item['explanation']}\n\n")
+            parts.append("---\n\n")
 
         # Save the markdown file
         with open(filename, 'w', encoding='utf-8') as f:
-            f.write(markdown)
+            f.write("".join(parts))
 
         print(f"Response saved as markdown to {filename}")
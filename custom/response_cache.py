@@ -0,0 +1,78 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
+
+class ResponseCache:
+    """LRU cache of LLM responses keyed on the request contents.
+
+    Responses are kept in memory and, when a directory is given, also persisted
+    on disk with diskcache so they survive between runs.
+    """
+
+    def __init__(self, max_entries: int = 256, directory: Optional[str] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of responses kept in memory before the least recently used is evicted
+            directory: Directory for a persistent on-disk cache, or None to keep responses in memory only
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._disk = None
+        if directory is not None:
+            try:
+                import diskcache
+            except ImportError:
+                raise ImportError("A persistent response cache requires the 'diskcache' package. "
+                                  "Install it with 'pip install diskcache'.")
+            self._disk = diskcache.Cache(directory)
+
+    @staticmethod
+    def make_key(model: Optional[str], messages: List[Dict], temperature: float, options: Optional[Dict] = None) -> str:
+        """Build a stable cache key for a request."""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "options": options or {}},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        elif self._disk is not None:
+            response = self._disk.get(key)
+            if response is not None:
+                self._remember(key, response)
+        return response
+
+    def put(self, key: str, response: str):
+        """Store a response, evicting the oldest in-memory entry if the cache is full."""
+        self._remember(key, response)
+        if self._disk is not None:
+            self._disk.set(key, response)
+
+    def _remember(self, key: str, response: str):
+        """Keep a response in memory as the most recently used entry."""
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached responses, including those on disk."""
+        self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self):
+        """Close the on-disk cache, if any."""
+        if self._disk is not None:
+            self._disk.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
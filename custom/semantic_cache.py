@@ -0,0 +1,72 @@
+import threading
+from typing import Any, List, Optional
+
+
+class SemanticCache:
+    """Cache of values keyed on the meaning of a text rather than its exact wording.
+
+    Texts are embedded locally with sentence-transformers, and a lookup returns
+    the value stored for the most similar earlier text if its cosine similarity
+    reaches the threshold. Lookups and updates are serialised with a lock, so
+    the cache can be used from worker threads.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", threshold: float = 0.92, max_entries: int = 1024):
+        """Initialize the cache.
+
+        Args:
+            model_name: sentence-transformers model used to embed texts
+            threshold: Minimum cosine similarity (0-1) for a cached value to be reused
+            max_entries: Maximum number of values kept before the oldest is evicted
+        """
+        try:
+            import numpy
+            import sentence_transformers
+        except ImportError:
+            raise ImportError("A semantic cache requires the 'sentence-transformers' package. "
+                              "Install it with 'pip install sentence-transformers'.")
+        self._np = numpy
+        self._sentence_transformers = sentence_transformers
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._model = None
+        self._embeddings = None
+        self._values: List[Any] = []
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str):
+        """Embed a text as a unit-length vector, loading the model on first use."""
+        if self._model is None:
+            self._model = self._sentence_transformers.SentenceTransformer(self.model_name)
+        return self._model.encode(text, normalize_embeddings=True)
+
+    def get(self, text: str) -> Optional[Any]:
+        """Return the value stored for the most similar text, or None if nothing is similar enough."""
+        with self._lock:
+            if not self._values:
+                return None
+            similarities = self._embeddings @ self._embed(text)
+            best = int(self._np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                return self._values[best]
+            return None
+
+    def put(self, text: str, value: Any):
+        """Store a value for a text, evicting the oldest entry if the cache is full."""
+        with self._lock:
+            embedding = self._embed(text)[self._np.newaxis, :]
+            if self._embeddings is None:
+                self._embeddings = embedding
+            else:
+                self._embeddings = self._np.vstack([self._embeddings, embedding])[-self.max_entries:]
+            self._values = (self._values + [value])[-self.max_entries:]
+
+    def clear(self):
+        """Remove all cached values."""
+        with self._lock:
+            self._embeddings = None
+            self._values = []
+
+    def __len__(self) -> int:
+        return len(self._values)
@@ -0,0 +1,72 @@
+"""Parsing of server-sent event streams from OpenAI-compatible chat completion APIs.
+
+The module is fully annotated and free of dynamic tricks, so it can be
+compiled with mypyc (`mypyc sse.py`) for faster token loops; the compiled
+extension is then picked up in place of this file on import.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import jsonlib
+
+def iter_sse_data(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Yield the data fields of server-sent events from a stream of raw byte chunks.
+
+    Bytes are buffered and split on event boundaries directly, so nothing is
+    decoded and lines that are not data fields (comments, blank lines) are
+    skipped as bytes.
+    """
+    buffer = bytearray()
+    separator: Optional[bytes] = None
+    scanned = 0
+    for chunk in chunks:
+        buffer += chunk
+        if separator is None:
+            if b"\r\n" in buffer:
+                separator = b"\r\n\r\n"
+            elif b"\n" in buffer:
+                separator = b"\n\n"
+            else:
+                continue
+        # Only rescan the tail of the buffer that could hold a new separator
+        while (end := buffer.find(separator, scanned)) != -1:
+            yield from _sse_event_data(bytes(buffer[:end]))
+            del buffer[:end + len(separator)]
+            scanned = 0
+        scanned = max(len(buffer) - len(separator) + 1, 0)
+
+    # A final event may not be followed by a blank line
+    yield from _sse_event_data(bytes(buffer))
+
+def _sse_event_data(event: bytes) -> Iterator[bytes]:
+    """Yield the data fields of a single server-sent event."""
+    for line in event.splitlines():
+        if line.startswith(b"data:"):
+            data = line[5:]
+            yield data[1:] if data.startswith(b" ") else data
+
+def read_openai_sse(chunks: Iterable[bytes], on_token: Optional[Callable[[str], Any]] = None) -> str:
+    """Collect the content of a streamed OpenAI-compatible chat completion.
+
+    Args:
+        chunks: Raw byte chunks of the response body
+        on_token: Called with each content delta as it arrives
+
+    Returns:
+        The full streamed content
+    """
+    parts: List[str] = []
+    for data in iter_sse_data(chunks):
+        if data.strip() == b"[DONE]":
+            break
+        try:
+            chunk: Dict[str, Any] = jsonlib.loads(data)
+        except (jsonlib.JSONDecodeError, ValueError):
+            continue
+        choices = chunk.get("choices")
+        if choices:
+            content = choices[0].get("delta", {}).get("content")
+            if content:
+                parts.append(content)
+                if on_token is not None:
+                    on_token(content)
+    return "".join(parts)
@@ -2,7 +2,7 @@ import openai
 import os
 from typing import List, Dict
 import json
-import requests
+import httpx
 from datetime import datetime
 import sys
 import time
@@ -19,6 +19,8 @@ class EnhancedRecursiveThinkingChat:
             "X-Title": "Recursive Thinking Chat",
             "Content-Type": "application/json"
         }
+        # Fail fast on unreachable hosts, but leave long generations time to finish
+        self.timeout = httpx.Timeout(600.0, connect=5.0)
         self.conversation_history = []
         self.full_thinking_log = []
     
@@ -35,14 +37,12 @@ class EnhancedRecursiveThinkingChat:
         }
         
         try:
-            response = requests.post(self.base_url, headers=self.headers, json=payload, stream=stream)
-            response.raise_for_status()
-            
             if stream:
                 full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        line = line.decode('utf-8')
+                with httpx.stream("POST", self.base_url, headers=self.headers, json=payload,
+                                  timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
                         if line.startswith("data: "):
                             line = line[6:]
                             if line.strip() == "[DONE]":
@@ -60,7 +60,9 @@ class EnhancedRecursiveThinkingChat:
                 print()  # New line after streaming
                 return full_response
             else:
-                return response.json()['choices'][0]['message']['content'].strip()
+                response = httpx.post(self.base_url, headers=self.headers, json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                return (response.json()['choices'][0]['message']['content'] or "").strip()
         except Exception as e:
             print(f"API Error: {e}")
             return "Error: Could not get response from API"
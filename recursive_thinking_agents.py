@@ -20,5 +20,5 @@ except ImportError as e:
     print("  pip install openai  # For OpenAI")
     print("  pip install anthropic  # For Claude")
     print("  pip install google-genai  # For Gemini")
-    print("  pip install requests  # For all agents")
+    print("  pip install httpx  # For all agents")
     sys.exit(1)